@@ -0,0 +1,190 @@
+import hashlib
+import html
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from pathlib import Path
+
+import numpy as np
+
+from brightness import BrightnessEngine, ditherMethodes
+from downsampler import Downsampler
+from pxl2ascii import PXL2ASCII
+
+imageExtensions = (".png", ".jpg", ".jpeg", ".npy")
+outputFormats = ["txt", "ansi", "html"]
+
+def findImages(source: str) -> tuple[Path, list[Path]]:
+    # a directory is searched recursively for images, anything else is used as glob pattern. Returns the base folder
+    # (outputs keep the folder structure below it) and the sorted image paths
+    if os.path.isdir(source):
+        base = Path(source)
+        paths = [path for path in base.rglob("*") if path.suffix.lower() in imageExtensions]
+    else:
+        paths = [Path(path) for path in glob(source, recursive=True) if Path(path).suffix.lower() in imageExtensions]
+        base = Path(os.path.commonpath([path.parent for path in paths])) if paths else Path(".")
+    return base, sorted(paths)
+
+def contentHash(path: Path, settings: dict) -> str:
+    # the cache key of an input: its content and everything that changes the outputs
+    with open(path, "rb") as file:
+        digest = hashlib.file_digest(file, "sha256")
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def htmlImage(glyphs: np.ndarray, colors: np.ndarray, background: str = "#000000") -> str:
+    # ascii image as html: the chars in a <pre> block, colored by runs of the same (24 bit) color
+    rows = list()
+    for rowGlyphs, rowColors in zip(glyphs, colors):
+        changes = np.flatnonzero(np.diff(rowColors)) + 1
+        spans = [f'<span style="color:#{int(run[0]):06x}">{html.escape("".join(chars))}</span>'
+                 for run, chars in zip(np.split(rowColors, changes), np.split(rowGlyphs, changes))]
+        rows.append("".join(spans))
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"></head>\n<body style="background:{background}">\n'
+            f'<pre style="font-family:monospace;line-height:1">\n' + "\n".join(rows) + "\n</pre>\n</body></html>\n")
+
+def convertImage(job: tuple[str, str, dict]) -> tuple[str, str | None]:
+    # converts one image (in a worker process) and writes '<stem>.<format>' for every format (the stem keeps the image
+    # extension, e.g. 'forest.jpg.txt', so images with the same name but another format don't overwrite each other).
+    # Returns (input, error)
+    path, stem, settings = job
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            ds = Downsampler()
+            ds.openImage(path)
+            # images smaller than the wanted width keep their size
+            ds.newWidth = min(settings["width"], ds.width)
+            ds.scaling = ds._checkParametersForScaling()
+            ds.downsampleTiled(settings["sampling"])
+        rgb = ds.downsampled[:, :, :3] if ds.pixelvalues >= 3 else np.repeat(ds.downsampled[:, :, :1], 3, axis=2)
+
+        converter = PXL2ASCII(settings["mask"])
+        outputs = dict()
+        if "txt" in settings["formats"] or "html" in settings["formats"]:
+            engine = BrightnessEngine(levels=len(settings["mask"]), gamma=settings["gamma"], dither=settings["dither"])
+            outputs["txt"] = converter.convertBrightnessToAscii(engine.brightness(rgb))
+            glyphs = converter.glyphs
+        if "html" in settings["formats"]:
+            converter.convertRGBToAscii(rgb * 255, colorMode="truecolor")
+            outputs["html"] = htmlImage(glyphs, converter.colors)
+        if "ansi" in settings["formats"]:
+            converter.convertRGBToAscii(rgb * 255, colorMode=settings["mode"])
+            outputs["ansi"] = converter.asciiImage
+
+        Path(stem).parent.mkdir(parents=True, exist_ok=True)
+        for output in settings["formats"]:
+            with open(f"{stem}.{output}", "w", encoding="utf-8") as file:
+                file.write(outputs[output])
+    except Exception as error:
+        return path, f"{type(error).__name__}: {error}"
+    return path, None
+
+def convertAll(source: str, outdir: str, settings: dict, processes: int | None = None, cachefile: str | None = None, force: bool = False) -> dict:
+    # converts all images of a directory/ glob into outdir (same folder structure). Images whose content and settings did
+    # not change since the last run (content hash in the cache file) and whose outputs still exist are skipped
+    base, paths = findImages(source)
+    cachefile = cachefile or os.path.join(outdir, ".pxl2ascii-cache.json")
+    cache = dict()
+    if os.path.exists(cachefile) and not force:
+        with open(cachefile, encoding="utf-8") as file:
+            cache = json.load(file)
+
+    jobs, hashes, skipped = list(), dict(), 0
+    for path in paths:
+        stem = str(Path(outdir) / path.relative_to(base))
+        key = contentHash(path, settings)
+        if cache.get(str(path)) == key and all(os.path.exists(f"{stem}.{output}") for output in settings["formats"]):
+            skipped += 1
+            continue
+        hashes[str(path)] = key
+        jobs.append((str(path), stem, settings))
+
+    failed = dict()
+    processes = min(processes or os.cpu_count() or 1, len(jobs))
+    if processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(convertImage, jobs, chunksize=max(1, len(jobs) // (4 * processes))))
+    else:
+        results = [convertImage(job) for job in jobs]
+    for path, error in results:
+        if error is None:
+            cache[path] = hashes[path]
+        else:
+            failed[path] = error
+            cache.pop(path, None)
+
+    Path(cachefile).parent.mkdir(parents=True, exist_ok=True)
+    with open(cachefile, "w", encoding="utf-8") as file:
+        json.dump(cache, file, indent=1)
+    return {"converted": len(jobs) - len(failed), "skipped": skipped, "failed": failed}
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if len(argv) < 2:
+        print("Convert all images of a directory (or a glob pattern like 'pics/**/*.png') to ascii. Usage:\n\n"
+              "\tpython batch.py <directory | glob> <output directory> [options]\n\n"
+              "\t-w width\tWidth in pixels, every pixel is two chars. Defaults to 50.\n"
+              "\t-f formats\tComma seperated outputs: txt (brightness chars), ansi (colored), html (colored chars), written as\n"
+              "\t\t\t<image name>.<format> (e.g. forest.jpg.txt). Defaults to txt,ansi,html.\n"
+              "\t-m mode\t\tColors of the ansi output: truecolor, 256 or 16. Defaults to truecolor.\n"
+              "\t-k kernel\tDownsampling: area, bilinear, lanczos, sub-sampling or box-sampling. Defaults to area.\n"
+              "\t-d dither\tDithering of the txt/html chars: bayer or floyd-steinberg. Defaults to none.\n"
+              "\t-g gamma\tGamma of the brightness (> 1 brightens the mid tones). Defaults to 1.\n"
+              "\t-a mask\t\tAscii mask of the txt/html outputs (brightest char first). Defaults to '@%#*+=-:. '.\n"
+              "\t-n processes\tNumber of worker processes. Defaults to the number of cpus.\n"
+              "\t-c file\t\tCache file. Defaults to <output directory>/.pxl2ascii-cache.json.\n"
+              "\t-force\t\tIgnore the cache and convert all images.")
+        exit(1)
+
+    source, outdir = argv[0], argv[1]
+    settings = {"width": 50, "formats": list(outputFormats), "mode": "truecolor", "sampling": "area", "mask": "@%#*+=-:. ", "dither": None, "gamma": 1.0}
+    processes, cachefile, force = None, None, False
+    try:
+        i = 2
+        while i < len(argv):
+            arg = argv[i]
+            if arg == "-force":
+                force = True
+                i += 1
+                continue
+            value = argv[i+1]
+            if arg == "-w":
+                settings["width"] = int(value)
+            elif arg == "-f":
+                settings["formats"] = value.split(",")
+            elif arg == "-m":
+                settings["mode"] = value
+            elif arg == "-k":
+                settings["sampling"] = value
+            elif arg == "-d":
+                settings["dither"] = value
+            elif arg == "-g":
+                settings["gamma"] = float(value)
+            elif arg == "-a":
+                settings["mask"] = value
+            elif arg == "-n":
+                processes = int(value)
+            elif arg == "-c":
+                cachefile = value
+            else:
+                print(f"Unknown option: {arg}!"); exit(1)
+            i += 2
+    except (IndexError, ValueError):
+        print(f"Please provide a valid value for {argv[i]}!"); exit(1)
+    if not set(settings["formats"]) <= set(outputFormats):
+        print(f"Output formats can be: {', '.join(outputFormats)}!"); exit(1)
+    if settings["mode"] not in ["truecolor", "256", "16"]:
+        print(f"Unknown mode '{settings['mode']}'!"); exit(1)
+    if settings["dither"] not in ditherMethodes + [None]:
+        print(f"Unknown dithering '{settings['dither']}'!"); exit(1)
+
+    start = time.perf_counter()
+    stats = convertAll(source, outdir, settings, processes, cachefile, force)
+    print(f"Converted {stats['converted']} images, skipped {stats['skipped']} unchanged ones in {time.perf_counter() - start:.1f}s.")
+    for path, error in stats["failed"].items():
+        print(f"\tFailed: {path} ({error})")
@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Rec.709 luma weights, as integers out of 256 for uint8 images (54 + 183 + 19 = 256)
+rec709 = (0.2126, 0.7152, 0.0722)
+rec709Int = (54, 183, 19)
+ditherMethodes = ["bayer", "floyd-steinberg"]
+
+@lru_cache(maxsize=4)
+def bayerMatrix(size: int = 4) -> np.ndarray:
+    # ordered dither thresholds in (-0.5, 0.5) of a size x size bayer matrix (size is a power of 2)
+    matrix = np.zeros((1, 1), dtype=np.int64)
+    while len(matrix) < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return ((matrix + 0.5) / matrix.size - 0.5).astype(np.float32)
+
+@lru_cache(maxsize=1)
+def srgbTables() -> tuple[np.ndarray, np.ndarray]:
+    # uint8 sRGB value -> linear light and the 4096 step inverse (linear light -> uint8 sRGB value)
+    encoded = np.arange(256) / 255
+    decode = np.where(encoded <= 0.04045, encoded / 12.92, ((encoded + 0.055) / 1.055) ** 2.4)
+    linear = np.arange(4096) / 4095
+    encode = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return decode.astype(np.float32), np.rint(encode * 255).astype(np.uint8)
+
+def _floydSteinbergLoop(work: np.ndarray, out: np.ndarray, levels: int) -> None:
+    # plain pixel by pixel error diffusion, compiled with numba if it is installed. work is the image with one column of
+    # padding on both sides and one row below (they take the errors leaving the image)
+    height, width = out.shape
+    for y in range(height):
+        for x in range(width):
+            value = work[y, x + 1]
+            level = min(max(np.floor(value * levels), 0.0), levels - 1.0)
+            out[y, x] = (level + 0.5) / levels
+            error = value - out[y, x]
+            work[y + 1, x] += error * 3 / 16
+            work[y + 1, x + 1] += error * 5 / 16
+            work[y + 1, x + 2] += error * 1 / 16
+            work[y, x + 2] += error * 7 / 16
+
+if njit is not None:
+    _floydSteinbergLoop = njit(cache=True)(_floydSteinbergLoop)
+
+def floydSteinberg(values: np.ndarray, levels: int, compiled: bool | None = None) -> np.ndarray:
+    # Floyd-Steinberg error diffusion to `levels` evenly spaced levels. Returns the center of the level of every pixel
+    # (e.g. 0.05, 0.15, ... for 10 levels), which is mapped to the same char by PXL2ASCII.
+    # Without numba the pixels are processed in wavefronts: a pixel only depends on its left neighbour and the three
+    # pixels above it, so all pixels with the same x + 2 * y are independent and are diffused at once. The errors are
+    # added in the same order as in the pixel loop, so both give the same result. compiled forces the numba loop (True)
+    # or the wavefront version (False), by default the loop is used if numba is installed
+    if compiled and njit is None:
+        raise ImportError("The compiled Floyd-Steinberg dithering needs numba: pip install numba (or use compiled=None/ False)")
+    height, width = values.shape
+    work = np.zeros((height + 1, width + 2))
+    work[:height, 1:width + 1] = values
+    out = np.empty((height, width))
+    if compiled or (compiled is None and njit is not None):
+        _floydSteinbergLoop(work, out, levels)
+        return out
+
+    rows = np.arange(height)
+    for front in range(width + 2 * (height - 1)):
+        cols = front - 2 * rows
+        valid = (cols >= 0) & (cols < width)
+        y, x = rows[valid], cols[valid]
+        value = work[y, x + 1]
+        level = np.clip(np.floor(value * levels), 0, levels - 1)
+        out[y, x] = (level + 0.5) / levels
+        error = value - out[y, x]
+        work[y + 1, x] += error * 3 / 16
+        work[y + 1, x + 1] += error * 5 / 16
+        work[y + 1, x + 2] += error * 1 / 16
+        work[y, x + 2] += error * 7 / 16
+    return out
+
+class BrightnessEngine:
+    def __init__(self, levels: int = 10, gamma: float = 1.0, contrast: float = 1.0, dither: str | None = None, linear: bool = False,
+                 bayerSize: int = 4) -> None:
+        # brightness (0-1) of rgb pixels for the ascii conversion: Rec.709 luminance, then gamma and contrast through a
+        # table of all 256 luminance values. levels is the number of chars of the ascii mask (the dithering quantizes to
+        # them). linear computes the luminance from linear light (sRGB decoded) instead of the encoded values
+        if dither not in ditherMethodes + [None]:
+            raise ValueError(f"dither can either be {', '.join(ditherMethodes)} or None")
+        self.levels = levels
+        self.dither = dither
+        self.linear = linear
+        self.bayerSize = bayerSize
+        self.curve = self.curveTable(gamma, contrast)
+
+    @staticmethod
+    def curveTable(gamma: float = 1.0, contrast: float = 1.0) -> np.ndarray:
+        # brightness of every uint8 luminance: gamma (> 1 brightens the mid tones), then contrast around the middle
+        values = (np.arange(256) / 255) ** (1 / gamma)
+        return np.clip((values - 0.5) * contrast + 0.5, 0, 1).astype(np.float32)
+
+    def luminance(self, rgbArray: np.ndarray) -> np.ndarray:
+        # uint8 luminance of uint8 rgb (or float rgb in 0-1)
+        rgb = np.asarray(rgbArray)[:, :, :3]
+        if not np.issubdtype(rgb.dtype, np.integer):
+            rgb = np.rint(np.clip(rgb, 0, 1) * 255).astype(np.uint8)
+        if self.linear:
+            decode, encode = srgbTables()
+            light = decode[rgb] @ np.array(rec709, dtype=np.float32)
+            return encode[np.rint(np.clip(light, 0, 1) * 4095).astype(np.intp)]
+        r, g, b = (rgb[:, :, i].astype(np.uint16) for i in range(3))
+        return ((rec709Int[0] * r + rec709Int[1] * g + rec709Int[2] * b + 128) >> 8).astype(np.uint8)
+
+    def brightness(self, rgbArray: np.ndarray) -> np.ndarray:
+        # float brightness array for PXL2ASCII.convertBrightnessToAscii (dithered if a dither methode is set)
+        values = self.curve[self.luminance(rgbArray)]
+        if self.dither == "bayer":
+            thresholds = bayerMatrix(self.bayerSize)
+            height, width = values.shape
+            tiled = np.tile(thresholds, (height // len(thresholds) + 1, width // len(thresholds) + 1))[:height, :width]
+            values = np.clip(values + tiled / self.levels, 0, 1)
+        elif self.dither == "floyd-steinberg":
+            values = floydSteinberg(values, self.levels)
+        return values
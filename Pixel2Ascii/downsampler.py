@@ -2,10 +2,59 @@ import matplotlib.image as mplim
 import matplotlib.pyplot as plt
 import numpy as np
 import warnings
+from functools import lru_cache
+from PIL import Image
+
+from brightness import BrightnessEngine
+
+# separable resampling kernels: (support radius, kernel function), "area" averages the covered source pixels exactly
+kernels = {
+    "area": None,
+    "bilinear": (1.0, lambda x: np.maximum(0.0, 1.0 - np.abs(x))),
+    "lanczos": (3.0, lambda x: np.sinc(x) * np.sinc(x / 3) * (np.abs(x) < 3)),
+}
+
+@lru_cache(maxsize=32)
+def weightBlocks(kernel: str, sourceSize: int, targetSize: int, block: int = 64) -> list[tuple[int, int, int, np.ndarray]]:
+    # weights of one axis, split into blocks of `block` output pixels: (output start, source start, source stop, weights).
+    # every block only covers the source pixels it needs, so applying it is a small dense matrix multiply. cached per
+    # (kernel, source size, target size), frames of the same size only pay the setup once
+    scale = sourceSize / targetSize
+    blocks = list()
+    for start in range(0, targetSize, block):
+        outputs = np.arange(start, min(start + block, targetSize))
+        if kernels[kernel] is None:
+            sourceStart, sourceStop = int(np.floor(outputs[0] * scale)), min(sourceSize, int(np.ceil((outputs[-1] + 1) * scale)))
+            pixels = np.arange(sourceStart, sourceStop)
+            weights = np.clip(np.minimum((outputs[:, None] + 1) * scale, pixels[None, :] + 1) - np.maximum(outputs[:, None] * scale, pixels[None, :]), 0, None)
+        else:
+            # downsampling stretches the kernel over the source pixels (antialiasing), edges only use the pixels inside
+            support, function = kernels[kernel]
+            stretch = max(scale, 1.0)
+            centers = (outputs + 0.5) * scale - 0.5
+            sourceStart = max(0, int(np.floor(centers[0] - support * stretch)))
+            sourceStop = min(sourceSize, int(np.ceil(centers[-1] + support * stretch)) + 1)
+            pixels = np.arange(sourceStart, sourceStop)
+            weights = function((pixels[None, :] - centers[:, None]) / stretch)
+        weights /= weights.sum(axis=1, keepdims=True)
+        blocks.append((start, sourceStart, sourceStop, weights.astype(np.float32)))
+    return blocks
+
+def blendAlpha(image: np.ndarray, background: tuple[int, int, int] = (0, 0, 0), bandHeight: int = 256) -> np.ndarray:
+    # blends a uint8 rgba image onto the background color with integer math (rounded), band by band so the uint16
+    # intermediate stays small. Returns uint8 rgb
+    rgb = np.empty((*image.shape[:2], 3), dtype=np.uint8)
+    background = np.array(background, dtype=np.uint16)
+    for start in range(0, len(image), bandHeight):
+        band = image[start:start + bandHeight]
+        alpha = band[:, :, 3:].astype(np.uint16)
+        rgb[start:start + bandHeight] = (band[:, :, :3] * alpha + background * (255 - alpha) + 127) // 255
+    return rgb
 
 class Downsampler:
     def __init__(self, filepath: str | None=None, newWidth: int = None, newHeight: int = None) -> None:
         self.newWidth, self.newHeight = newWidth, newHeight
+        self.integer = False
         if filepath is not None:
             self.loadImage(filepath)
             self.height, self.width, _ = self.image.shape
@@ -16,6 +65,7 @@ class Downsampler:
         plt.show()
 
     def loadImage(self, filepath: str) -> None:
+        self.integer = False
         self.image = mplim.imread(filepath)
         self.downsampled = self.image
         self.height, self.width, _ = self.image.shape
@@ -28,7 +78,26 @@ class Downsampler:
             self.pixelvalues = 3
             self.normalize = 255
 
+    def loadImage8(self, filepath: str, background: tuple[int, int, int] = (0, 0, 0)) -> None:
+        # integer pipeline: png and jpg are both decoded to uint8 rgb (transparent pixels are blended onto the background)
+        # and stay uint8 through the downsampling to getRGBArray/ getBrightnessArray, no float copies of the image
+        with Image.open(filepath) as pil:
+            transparent = pil.mode in ["RGBA", "LA", "PA"] or "transparency" in pil.info
+            mode = "RGBA" if transparent else "RGB"
+            image = np.asarray(pil if pil.mode == mode else pil.convert(mode))
+        self.image = blendAlpha(image, background) if transparent else image
+        self.integer = True
+        self.downsampled = self.image
+        self.height, self.width, self.pixelvalues = self.image.shape
+        self.normalize = 255
+        self.scaling = self._checkParametersForScaling()
+
     def downsampleImage(self, samplingMethode: str = "sub-sampling") -> None:
+        if self.integer and samplingMethode == "area":
+            print("Downsampling image with integer area averaging:")
+            self.downsampled = self.areaSampling8(self.scaling)
+            return
+
         if samplingMethode == "sub-sampling":
             print("Downsampling image with subsampling:")
             self.downsampled = self.subSampling(self.scaling)
@@ -41,48 +110,233 @@ class Downsampler:
             print("Downsampling image with box sampling:")
             self.downsampled = self.boxSampling(self.scaling)
 
-    def subSampling(self, scaling: float) -> np.ndarray:
+        elif samplingMethode in kernels:
+            print(f"Downsampling image with {samplingMethode} resampling:")
+            self.downsampled = self.resampling(self.scaling, samplingMethode)
+
+        else:
+            raise ValueError(f"Unknown sampling methode '{samplingMethode}'.")
+
+        if self.integer:
+            # the other methods work in floats, only the (small) output is quantized back to uint8
+            self.downsampled = np.rint(self.downsampled * 255).astype(np.uint8)
+
+    def openImage(self, filepath: str, shape: tuple[int, ...] | None = None, dtype: str = "uint8") -> None:
+        # opens the image without reading it: .npy files are memory-mapped, raw files (pixel values only) need the shape
+        # (height, width[, channels]) and dtype. Other formats can't be read lazily and are decoded with imread
+        self.integer = False
+        if filepath.endswith(".npy"):
+            self.image = np.load(filepath, mmap_mode="r")
+        elif shape is not None:
+            self.image = np.memmap(filepath, dtype=dtype, mode="r", shape=tuple(shape))
+        else:
+            self.image = mplim.imread(filepath)
+        if self.image.ndim == 2:
+            self.image = self.image.reshape(*self.image.shape, 1)
+        self.downsampled = self.image
+        self.height, self.width, self.pixelvalues = self.image.shape
+        self.normalize = np.iinfo(self.image.dtype).max if np.issubdtype(self.image.dtype, np.integer) else 1
+        self.scaling = self._checkParametersForScaling()
+
+    def downsampleTiled(self, samplingMethode: str = "box-sampling", bandHeight: int = 64, dtype: type = np.float32, outfile: str | None = None) -> None:
+        # downsamples bandHeight output rows at a time and only reads the source rows needed for them, so the memory used
+        # is proportional to one band. The result is written into a preallocated array (or a .npy file given by outfile).
+        # Integer dtypes get the values scaled to their full range (e.g. 0-255 for uint8)
+        shape = (round(self.height * self.scaling), round(self.width * self.scaling), self.pixelvalues)
+        newImage = np.lib.format.open_memmap(outfile, mode="w+", dtype=dtype, shape=shape) if outfile else np.empty(shape, dtype=dtype)
+        self._downsampleInto(newImage, samplingMethode, bandHeight, lazy=True)
+        if outfile:
+            newImage.flush()
+        self.downsampled = newImage
+
+    def setFrame(self, frame: np.ndarray) -> None:
+        # uses an already decoded frame (e.g. of a video) as image. The scaling is only computed again if the size changes
+        if frame.ndim == 2:
+            frame = frame.reshape(*frame.shape, 1)
+        if not hasattr(self, "image") or frame.shape != self.image.shape or frame.dtype != self.image.dtype:
+            self.height, self.width, self.pixelvalues = frame.shape
+            self.normalize = np.iinfo(frame.dtype).max if np.issubdtype(frame.dtype, np.integer) else 1
+            self.scaling = self._checkParametersForScaling()
+        self.image = frame
+
+    def downsampleFrame(self, frame: np.ndarray, newImage: np.ndarray | None = None, samplingMethode: str = "area") -> np.ndarray:
+        # downsamples a frame into newImage (float32 array of the output size) so that the output buffer can be reused
+        self.setFrame(frame)
+        if newImage is None:
+            newImage = np.empty((round(self.height * self.scaling), round(self.width * self.scaling), self.pixelvalues), dtype=np.float32)
+        self._downsampleInto(newImage, samplingMethode, 64, lazy=False)
+        self.downsampled = newImage
+        return newImage
+
+    def _downsampleInto(self, newImage: np.ndarray, samplingMethode: str, bandHeight: int, lazy: bool) -> None:
+        rows, cols = self._sourceIndices(self.scaling)
+        # the bands are computed in floats (0-1), integer outputs get them rounded to their full range
+        scale = np.iinfo(newImage.dtype).max if np.issubdtype(newImage.dtype, np.integer) else None
+
+        def store(start: int, values: np.ndarray) -> None:
+            newImage[start:start + len(values)] = values if scale is None else np.rint(np.clip(values.astype(np.float64), 0, 1) * scale)
+
+        if samplingMethode in kernels:
+            for start, sourceStart, sourceStop, weights in weightBlocks(samplingMethode, self.height, len(rows), bandHeight):
+                source = self._readRowRange(sourceStart, sourceStop) if lazy else self.image[sourceStart:sourceStop]
+                store(start, self._resampleBand(source, weights, samplingMethode, len(cols)))
+            return
+        for start in range(0, len(rows), bandHeight):
+            band = rows[start:start + bandHeight]
+            if samplingMethode == "sub-sampling":
+                store(start, self._subBand(band, cols, lazy))
+            elif samplingMethode == "nearest-av":
+                store(start, self._boxBand(band, cols, [(-1, -1), (-1, 1), (1, -1), (1, 1)], lazy))
+            elif samplingMethode == "box-sampling":
+                store(start, self._boxBand(band, cols, self._defaultBox(self.scaling), lazy))
+            else:
+                raise ValueError(f"Unknown sampling methode '{samplingMethode}'.")
+
+    def _sourceIndices(self, scaling: float) -> tuple[np.ndarray, np.ndarray]:
+        # source pixel of every output row/ column (rounded half to even like round())
+        newHeight, newWidth = round(self.height * scaling), round(self.width * scaling)
+        return np.round(np.arange(newHeight) / scaling).astype(np.intp), np.round(np.arange(newWidth) / scaling).astype(np.intp)
+
+    def _readRows(self, rows: np.ndarray, lazy: bool) -> tuple[np.ndarray, np.ndarray]:
+        # returns the source and the indices of the rows in it. lazy images only get the given rows read
+        if not lazy:
+            return self.image, rows
+        needed, index = np.unique(rows, return_inverse=True)
+        runs = np.split(needed, np.flatnonzero(np.diff(needed) > 1) + 1)
+        source = np.concatenate([self._readRowRange(run[0], run[-1] + 1) for run in runs]) if len(runs) > 1 else self._readRowRange(needed[0], needed[-1] + 1)
+        return source, index.reshape(rows.shape)
+
+    def _readRowRange(self, start: int, stop: int) -> np.ndarray:
+        # memory-mapped images are read with plain file reads, so no pages of the mapping stay in memory
+        if isinstance(self.image, np.memmap) and self.image.flags.c_contiguous:
+            rowSize = self.width * self.pixelvalues
+            rows = np.fromfile(self.image.filename, dtype=self.image.dtype, count=(stop - start) * rowSize,
+                               offset=self.image.offset + start * rowSize * self.image.itemsize)
+            return rows.reshape(stop - start, self.width, self.pixelvalues)
+        return np.asarray(self.image[start:stop])
+
+    def _subBand(self, rows: np.ndarray, cols: np.ndarray, lazy: bool = False) -> np.ndarray:
+        source, index = self._readRows(rows, lazy)
+        return source[index[:, None], cols[None, :]] / self.normalize
+
+    def _boxBand(self, rows: np.ndarray, cols: np.ndarray, box: list[tuple], lazy: bool = False) -> np.ndarray:
+        # every box offset is gathered for all output pixels at once. samples past the bottom/ right edge are skipped,
+        # negative indices wrap around (same as indexing the image with them)
+        rowOffsets, colOffsets = sorted({dh for dh, _ in box}), sorted({dw for _, dw in box})
+        rectangle = (rowOffsets[-1] - rowOffsets[0] + 1 == len(rowOffsets) and colOffsets[-1] - colOffsets[0] + 1 == len(colOffsets)
+                     and len(box) == len(set(box)) == len(rowOffsets) * len(colOffsets))
+        if rectangle and np.issubdtype(self.image.dtype, np.integer):
+            return self._boxSumBand(rows, cols, (rowOffsets[0], rowOffsets[-1]), (colOffsets[0], colOffsets[-1]), lazy)
+
+        sourceRows = rows[None, :] + np.array([dh for dh, _ in box], dtype=np.intp)[:, None]
+        validRows = (sourceRows >= -self.height) & (sourceRows < self.height)
+        source, index = self._readRows(sourceRows % self.height, lazy)
+
+        accumulator = np.float64 if np.issubdtype(self.image.dtype, np.integer) else self.image.dtype
+        total = np.zeros((len(rows), len(cols), self.image.shape[2]), dtype=accumulator)
+        count = np.zeros((len(rows), len(cols)), dtype=np.intp)
+        for k, (_, dw) in enumerate(box):
+            c = cols + dw
+            validCols = (c >= -self.width) & (c < self.width)
+            samples = source[index[k][:, None], (c % self.width)[None, :]]
+            valid = validRows[k][:, None] & validCols[None, :]
+            total += np.where(valid[:, :, None], samples, 0)
+            count += valid
+
+        return total / count[:, :, None].astype(accumulator) / self.normalize
+
+    def _boxSumBand(self, rows: np.ndarray, cols: np.ndarray, rowRange: tuple[int, int], colRange: tuple[int, int], lazy: bool = False) -> np.ndarray:
+        # rectangular boxes of integer images: the rows of the boxes are added up in int64, then the box sums are taken
+        # from a summed-area table (cumulative sum) of the padded columns: wrapped around on the left, zeros past the right
+        # edge. All sums are exact, so the result is the same as adding up the samples one by one
+        sourceRows = rows[None, :] + np.arange(rowRange[0], rowRange[1] + 1)[:, None]
+        validRows = (sourceRows >= -self.height) & (sourceRows < self.height)
+        source, index = self._readRows(sourceRows % self.height, lazy)
+        rowSums = np.zeros((len(rows), self.width, self.image.shape[2]), dtype=np.int64)
+        for k in range(len(sourceRows)):
+            np.add(rowSums, source[index[k]], out=rowSums, where=validRows[k][:, None, None])
+
+        colPositions = np.arange(cols[0] + colRange[0], cols[-1] + colRange[1] + 1)
+        validCols = (colPositions >= -self.width) & (colPositions < self.width)
+        table = np.zeros((len(rows), len(colPositions) + 1, self.image.shape[2]), dtype=np.int64)
+        np.cumsum(np.where(validCols[None, :, None], rowSums[:, colPositions % self.width], 0), axis=1, out=table[:, 1:])
+        left = cols + colRange[0] - colPositions[0]
+        right = left + colRange[1] - colRange[0] + 1
+        total = (table[:, right] - table[:, left]).astype(np.float64)
+
+        colCounts = np.concatenate([[0], np.cumsum(validCols)])
+        count = validRows.sum(axis=0)[:, None] * (colCounts[right] - colCounts[left])[None, :]
+        return total / count[:, :, None].astype(np.float64) / self.normalize
+
+    @staticmethod
+    def _defaultBox(scaling: float) -> list[tuple]:
+        numSamples = int(np.floor(1 / scaling))
+        box = list()
+        for nh in range(numSamples):
+            for nw in range(numSamples):
+                box.append((int(np.floor(numSamples / 2 - nh)), int(np.floor(numSamples / 2 - nw))))
+        return box
+
+    def _resampleBand(self, source: np.ndarray, rowWeights: np.ndarray, kernel: str, newWidth: int) -> np.ndarray:
+        # rows are combined with one matrix multiply, then the columns block by block
+        band = (rowWeights @ source.reshape(len(source), -1).astype(np.float32)).reshape(len(rowWeights), self.width, -1)
+        newBand = np.empty((len(rowWeights), newWidth, band.shape[2]), dtype=np.float32)
+        for start, sourceStart, sourceStop, weights in weightBlocks(kernel, self.width, newWidth):
+            newBand[:, start:start + len(weights)] = (band[:, sourceStart:sourceStop].transpose(0, 2, 1) @ weights.T).transpose(0, 2, 1)
+        return np.clip(newBand / self.normalize, 0, 1)
+
+    def resampling(self, scaling: float, kernel: str = "area") -> np.ndarray:
         newHeight, newWidth = round(self.height * scaling), round(self.width * scaling)
         newImage = np.zeros((newHeight, newWidth, self.pixelvalues))
+        for start, sourceStart, sourceStop, weights in weightBlocks(kernel, self.height, newHeight):
+            newImage[start:start + len(weights)] = self._resampleBand(self.image[sourceStart:sourceStop], weights, kernel, newWidth)
 
-        for i in range(newHeight):
-            print(f"\rProgress: {i / (newHeight - 1) * 100:.1f}%", end="")
-            for j in range(newWidth):
-                newImage[i][j] = self.image[round(i / scaling)][round(j / scaling)] / self.normalize
-        
-        print()
         return newImage
-    
-    def boxSampling(self, scaling: float, box: list[tuple] | None = None) -> np.ndarray:
+
+    def areaSampling8(self, scaling: float) -> np.ndarray:
+        # integer area averaging of uint8 images: every output pixel is the rounded mean of the source pixels in its cell
+        # (cells split the image at integer positions). The rows of a cell are summed into one uint32 row (buffered, the
+        # source rows are never converted as a whole), then the columns of the cells
         newHeight, newWidth = round(self.height * scaling), round(self.width * scaling)
-        newImage = np.zeros((newHeight, newWidth, self.pixelvalues))
-        numSamples = int(np.floor(1 / scaling))
+        rowEdges = np.arange(newHeight + 1) * self.height // newHeight
+        colEdges = np.arange(newWidth + 1) * self.width // newWidth
+        colCounts = np.diff(colEdges).astype(np.uint32)[:, None]
+        newImage = np.empty((newHeight, newWidth, self.pixelvalues), dtype=np.uint8)
+        for row in range(newHeight):
+            sums = np.add.reduceat(self.image[rowEdges[row]:rowEdges[row + 1]].sum(axis=0, dtype=np.uint32), colEdges[:-1], axis=0)
+            counts = colCounts * np.uint32(rowEdges[row + 1] - rowEdges[row])
+            newImage[row] = (sums + counts // 2) // counts
+        return newImage
+
+    def subSampling(self, scaling: float) -> np.ndarray:
+        rows, cols = self._sourceIndices(scaling)
+        newImage = np.zeros((len(rows), len(cols), self.pixelvalues))
+        newImage[:] = self._subBand(rows, cols)
 
+        return newImage
+    
+    def boxSampling(self, scaling: float, box: list[tuple] | None = None) -> np.ndarray:
+        rows, cols = self._sourceIndices(scaling)
         if box is None:
-            box = list()
-            for nh in range(numSamples):
-                for nw in range(numSamples):
-                    box.append((int(np.floor(numSamples / 2 - nh)), int(np.floor(numSamples / 2 - nw))))
-
-        for i in range(newHeight):
-            print(f"\rProgress: {i / (newHeight - 1) * 100:.1f}%", end="")
-            for j in range(newWidth):
-                samples = list()
-                mainPxl = round(i / scaling), round(j / scaling)
-                for n in box:
-                    try:
-                        samples.append(self.image[mainPxl[0] + n[0]][mainPxl[1] + n[1]])
-                    except IndexError:
-                        continue
-                newImage[i][j] = np.mean(samples, axis=0) / self.normalize
-        
-        print()
+            box = self._defaultBox(scaling)
+
+        newImage = np.zeros((len(rows), len(cols), self.pixelvalues))
+        newImage[:] = self._boxBand(rows, cols, box)
+
         return newImage
     
-    def getBrightnessArray(self) -> np.ndarray:
+    def getBrightnessArray(self, engine: BrightnessEngine | None = None) -> np.ndarray:
+        # mean of r, g and b, or the (dithered) brightness of a BrightnessEngine
+        if engine is not None:
+            return engine.brightness(self.downsampled)
+        if self.integer:
+            # uint8 brightness (0-255), PXL2ASCII maps it with a table of all 256 values
+            return ((self.downsampled[:, :, :3].sum(axis=2, dtype=np.uint16) + 1) // 3).astype(np.uint8)
         return np.mean(self.downsampled[:, :, :3], axis=2)
     
     def getRGBArray(self) -> np.ndarray:
+        if self.integer:
+            return self.downsampled[:, :, :3]
         return self.downsampled[:, :, :3] * 255
 
     def _checkParametersForScaling(self) -> float:
@@ -2,51 +2,7 @@ import numpy as np
 import time
 import threading
 
-class PXL2ASCII:
-    def __init__(self, asciiMask: str | list[str] | dict | None = None) -> None:
-        if asciiMask is None:
-            self.converter = {0.667: "#", 0.334: ".", 0.0: " "}
-        else:
-            self.converter = self._getAsciiConverter(asciiMask)
-
-    def convertBrightnessToAscii(self, brightnessArray: list[list[int]]) -> None:
-        self.asciiImage = ""
-        for i in range(len(brightnessArray)):
-            for j in range(len(brightnessArray[0])):
-                for cap in self.converter:
-                    if brightnessArray[i][j] >= cap:
-                        self.asciiImage += f"{self.converter[cap]} "
-                        break
-            self.asciiImage += "\n"
-
-    @staticmethod
-    def rgbText(r: int, g: int, b: int, text: str = "\u2588"):
-        return f"\x1b[38;2;{r};{g};{b}m{text}{text}\x1b[0m"
-
-    def convertRGBToAscii(self, rgbArray: list[list[list[int]]]) -> None:
-        self.asciiImage = ""
-        for i in range(len(rgbArray)):
-            for j in range(len(rgbArray[0])):
-                r, g, b = rgbArray[i,j,:3]
-                self.asciiImage += self.rgbText(int(r), int(g), int(b))
-            self.asciiImage += "\n"
-        
-    def _getAsciiConverter(self, asciiMask: str | list[str] | dict) -> dict:
-        if isinstance(asciiMask, str) or isinstance(asciiMask, list):
-            return dict([(1 - (i + 1) / len(asciiMask), char) for i, char in enumerate(asciiMask)])
-
-        elif isinstance(asciiMask, dict):
-            return dict(reversed(sorted(asciiMask.items())))
-    
-    @staticmethod
-    def clearLines(n: int = 0):
-        LINE_UP = "\033[1A"
-        LINE_CLEAR = "\x1b[2K"
-        for _ in range(n):
-            print(LINE_UP, end=LINE_CLEAR)
-
-    def show(self, prefix: str = "", end: str = "\n") -> None:
-        print(f"{prefix}{self.asciiImage}", end=end)
+from pxl2ascii import PXL2ASCII
 
 class LayoutVisualizer:
     def __init__(self, chipLayout: dict, mode: str = "ascii", chipSize: tuple[int] = (45, 30), structSize: int = 2, border: int = 1, padding: int = 2) -> None:
@@ -58,7 +14,8 @@ class LayoutVisualizer:
         self.setColorMode(mode)
 
         self.array = self.emptyArray()
-        self.visualizer = PXL2ASCII(self.asciiMask())
+        # the caps of the mask are checked from the highest one
+        self.visualizer = PXL2ASCII(dict(sorted(self.asciiMask().items(), reverse=True)))
 
     def setColorMode(self, mode: str):
         self.colors = dict()
@@ -200,9 +157,10 @@ class LayoutVisualizer:
             self.visualizer.convertRGBToAscii(self.rotatedArray(rotCW90))
 
         if clear:
-            self.visualizer.clearLines(self.visualizer.asciiImage.count("\n") + 2)
-
-        self.visualizer.show(prefix="\n")
+            # redraw in place: only the cells that changed since the last call (e.g. the blinking hexapod) are written
+            self.visualizer.showChanges(prefix="\n")
+        else:
+            self.visualizer.show(prefix="\n")
 
     def changeHexapodPos(self, structure: str, blink: bool = False) -> None:
         for struct in self.structureCoords:
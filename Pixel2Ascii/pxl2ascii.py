@@ -1,33 +1,141 @@
+from functools import lru_cache
+
+import numpy as np
+
+# rgb values of the 16 standard terminal colors (escape codes 30-37 and 90-97)
+ansi16 = [(0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+          (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)]
+
+@lru_cache(maxsize=2)
+def paletteLookup(colorMode: str) -> np.ndarray:
+    # lookup table from rgb (5 bits per channel) to the index of the nearest palette color. the 256 color palette uses
+    # the 6x6x6 color cube and the gray ramp (16-255), the 16 system colors differ between terminals
+    if colorMode == "256":
+        levels = [0, 95, 135, 175, 215, 255]
+        palette = [(r, g, b) for r in levels for g in levels for b in levels] + [(8 + 10 * i,) * 3 for i in range(24)]
+        offset = 16
+    else:
+        palette, offset = ansi16, 0
+    steps = np.arange(32) * 255 / 31
+    grid = np.stack(np.meshgrid(steps, steps, steps, indexing="ij"), axis=-1).reshape(-1, 1, 3)
+    nearest = np.argmin(((grid - np.array(palette)[None, :, :]) ** 2).sum(axis=2), axis=1)
+    return (nearest + offset).reshape(32, 32, 32)
+
+def colorEscape(colorMode: str, color: int) -> str:
+    if colorMode == "truecolor":
+        return f"\x1b[38;2;{color >> 16};{(color >> 8) & 255};{color & 255}m"
+    elif colorMode == "256":
+        return f"\x1b[38;5;{color}m"
+    return f"\x1b[{30 + color if color < 8 else 82 + color}m"
+
+class DeltaRenderer:
+    def __init__(self) -> None:
+        # keeps the glyph and color grid of the last frame and only redraws the cells that changed. every cell is two
+        # columns wide and the cursor is moved relative to the line below the frame, so it can start anywhere on screen
+        self.glyphs = None
+        self.colors = None
+
+    def reset(self) -> None:
+        self.glyphs = None
+
+    def render(self, asciiImage: str, glyphs: np.ndarray, colors: np.ndarray | None = None, colorMode: str = "truecolor") -> str:
+        # the first frame (and frames of another size) is the full asciiImage, afterwards only the changes
+        if self.glyphs is None or glyphs.shape != self.glyphs.shape or (colors is None) != (self.colors is None):
+            frame = asciiImage
+        else:
+            frame = self._changes(glyphs, colors, colorMode)
+        self.glyphs = glyphs.copy()
+        self.colors = None if colors is None else colors.copy()
+        return frame
+
+    def _changes(self, glyphs: np.ndarray, colors: np.ndarray | None, colorMode: str) -> str:
+        changed = glyphs != self.glyphs
+        if colors is not None:
+            changed |= colors != self.colors
+        rows, cols = np.nonzero(changed)
+        if not len(rows):
+            return ""
+
+        # the cursor is only moved to the start of a run of changed cells (up/ down from the last row, absolute column)
+        starts = np.ones(len(rows), dtype=bool)
+        starts[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1] + 1)
+        runRows = rows[starts]
+        lines = np.diff(runRows, prepend=len(glyphs)).tolist()
+        pieces = np.full(len(rows), "", dtype=object)
+        pieces[starts] = [(f"\x1b[{-n}A" if n < 0 else f"\x1b[{n}B" if n else "") + f"\x1b[{2 * col + 1}G" for n, col in zip(lines, cols[starts].tolist())]
+        if colors is not None:
+            # the color stays set across cursor movements, an escape is only needed where it changes
+            cellColors = colors[rows, cols]
+            escapes = np.ones(len(rows), dtype=bool)
+            escapes[1:] = cellColors[1:] != cellColors[:-1]
+            pieces[escapes] += np.array([colorEscape(colorMode, color) for color in cellColors[escapes].tolist()], dtype=object)
+        text = glyphs[rows, cols]
+        text[text == ""] = "  "
+        reset = "\x1b[0m" if colors is not None else ""
+        return "".join((pieces + text).tolist()) + f"{reset}\x1b[{len(glyphs) - runRows[-1]}B\r"
+
 class PXL2ASCII:
     def __init__(self, asciiMask: str | list[str] | dict | None = None) -> None:
         if asciiMask is None:
             self.converter = {}
         else:
             self.converter = self.getAsciiConverter(asciiMask)
+        self.renderer = DeltaRenderer()
 
     def convertBrightnessToAscii(self, brightnessArray: list[list[int]]) -> str:
-        asciiImage = ""
-        for i in range(len(brightnessArray)):
-            for j in range(len(brightnessArray[0])):
-                for cap in self.converter:
-                    if brightnessArray[i][j] >= cap:
-                        asciiImage += f"{self.converter[cap]} "
-                        break
-            asciiImage += "\n"
-        
-        return asciiImage
+        self.asciiImage = self._lookupAscii(brightnessArray)
+        return self.asciiImage
+
+    def _lookupTable(self, dtype: np.dtype) -> tuple[np.ndarray, np.ndarray]:
+        # a pixel gets the char of the first cap (in converter order) it reaches. caps that are not lower than an earlier
+        # cap can never be the first one, the remaining caps are descending and are returned ascending for searchsorted
+        dtype = dtype if np.issubdtype(dtype, np.floating) else np.float64
+        caps, chars = list(), list()
+        for cap, char in zip(np.array(list(self.converter), dtype=dtype), self.converter.values()):
+            if not caps or cap < caps[-1]:
+                caps.append(cap)
+                chars.append(f"{char} ")
+        return np.array(caps[::-1], dtype=dtype), np.array(chars[::-1] + [""], dtype=object)
+
+    def _lookupAscii(self, brightnessArray: list[list[int]]) -> str:
+        brightness = np.asarray(brightnessArray)
+        caps, chars = self._lookupTable(brightness.dtype)
+        # index -1 (below the lowest cap) points to the empty string at the end of the char table
+        if brightness.dtype == np.uint8:
+            # 8 bit brightness (0-255 for 0-1): looks up the index of every possible value once
+            index = (np.searchsorted(caps, np.arange(256) / 255, side="right") - 1)[brightness]
+        else:
+            index = np.searchsorted(caps, brightness, side="right") - 1
+        if np.issubdtype(brightness.dtype, np.floating):
+            index[np.isnan(brightness)] = -1
+        # char and color grid of the last conversion for the delta rendering
+        self.glyphs, self.colors, self.colorMode = chars[index], None, None
+        lines = np.concatenate([self.glyphs, np.full((len(brightness), 1), "\n", dtype=object)], axis=1)
+        return "".join(lines.ravel().tolist())
     
     @staticmethod
     def rgbText(r: int, g: int, b: int, text: str = "\u2588"):
         return f"\x1b[38;2;{r};{g};{b}m{text}{text}\x1b[0m"
 
-    def convertRGBToAscii(self, rgbArray: list[list[list[int]]]) -> None:
-        self.asciiImage = ""
-        for i in range(len(rgbArray)):
-            for j in range(len(rgbArray[0])):
-                r, g, b = rgbArray[i,j,:3]
-                self.asciiImage += self.rgbText(int(r), int(g), int(b))
-            self.asciiImage += "\n"
+    def convertRGBToAscii(self, rgbArray: list[list[list[int]]], colorMode: str = "truecolor", text: str = "\u2588") -> None:
+        # colorMode: "truecolor" (24 bit), "256" or "16" colors. A color escape is only written where the color changes
+        # along a row (run-length coalescing), every row ends with a reset
+        rgb = np.asarray(rgbArray)[:, :, :3].astype(np.int64)
+        if colorMode == "truecolor":
+            colors = (rgb[:, :, 0] << 16) | (rgb[:, :, 1] << 8) | rgb[:, :, 2]
+        elif colorMode in ["256", "16"]:
+            colors = paletteLookup(colorMode)[tuple(np.clip(rgb, 0, 255).transpose(2, 0, 1) >> 3)]
+        else:
+            raise ValueError("colorMode can either be truecolor, 256 or 16")
+
+        self.glyphs, self.colors, self.colorMode = np.full(colors.shape, text + text, dtype=object), colors, colorMode
+        unique, index = np.unique(colors, return_inverse=True)
+        escapes = np.array([colorEscape(colorMode, color) + text + text for color in unique.tolist()] + [text + text], dtype=object)
+        # pixels with the same color as their left neighbour only repeat the text (last entry of escapes)
+        index = index.reshape(colors.shape)
+        index[:, 1:][colors[:, 1:] == colors[:, :-1]] = len(unique)
+        lines = np.concatenate([escapes[index], np.full((len(colors), 1), "\x1b[0m\n", dtype=object)], axis=1)
+        self.asciiImage = "".join(lines.ravel().tolist())
 
     def getAsciiConverter(self, asciiMask: str | list[str] | dict) -> dict:
         if isinstance(asciiMask, str) or isinstance(asciiMask, list):
@@ -45,4 +153,9 @@ class PXL2ASCII:
 
     def show(self, prefix: str = "", end: str = "\n") -> None:
         #self.clearLines(len(self.asciiImage.split("\n")[0]))
-        print(f"{prefix}{self.asciiImage}", end=end)
\ No newline at end of file
+        print(f"{prefix}{self.asciiImage}", end=end)
+
+    def showChanges(self, prefix: str = "") -> None:
+        # animated output: shows the full image the first time, afterwards only redraws the cells that changed since the
+        # last call. the cursor ends up below the image (nothing else may be printed in between)
+        print(self.renderer.render(f"{prefix}{self.asciiImage}", self.glyphs, self.colors, self.colorMode), end="", flush=True)
\ No newline at end of file
@@ -0,0 +1,298 @@
+import io
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+from brightness import BrightnessEngine
+from downsampler import Downsampler
+from pxl2ascii import PXL2ASCII, paletteLookup
+
+class RawFrameReader:
+    def __init__(self, stream: BinaryIO, width: int, height: int, live: bool = False, process: subprocess.Popen | None = None) -> None:
+        # reads rgb24 frames (width * height * 3 bytes each) from a file or a pipe, e.g. the output of
+        # ffmpeg -i video.mp4 -f rawvideo -pix_fmt rgb24 -   (live sources like webcams drop frames instead of waiting).
+        # process is the decoder writing into the pipe, it is stopped on close
+        self.stream = stream
+        self.width, self.height = width, height
+        self.frameSize = width * height * 3
+        self.live = live
+        self.process = process
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        while True:
+            data = self.stream.read(self.frameSize)
+            while data and len(data) < self.frameSize:
+                more = self.stream.read(self.frameSize - len(data))
+                if not more:
+                    break
+                data += more
+            if len(data) < self.frameSize:
+                return
+            yield np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def close(self) -> None:
+        self.stream.close()
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+def openVideo(filepath: str, size: tuple[int, int] | None = None, live: bool = False) -> RawFrameReader:
+    # '-' reads a raw frame pipe from stdin, .rgb/.raw files are raw rgb24 frames (both need the size), everything else
+    # is decoded by ffmpeg
+    if filepath == "-":
+        return RawFrameReader(sys.stdin.buffer, *size, live=live)
+    if filepath.endswith((".rgb", ".raw")):
+        return RawFrameReader(open(filepath, "rb"), *size)
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        raise RuntimeError("Decoding videos needs ffmpeg (or convert the video to raw rgb24 frames first).")
+    if size is None:
+        probe = subprocess.run(["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height", "-of", "csv=p=0", filepath],
+                               capture_output=True, text=True, check=True)
+        size = tuple(int(n) for n in probe.stdout.strip().split(",")[:2])
+    decoder = subprocess.Popen(["ffmpeg", "-loglevel", "error", "-i", filepath, "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-"],
+                               stdout=subprocess.PIPE)
+    return RawFrameReader(decoder.stdout, *size, process=decoder)
+
+def syntheticVideo(filepath: str, width: int = 320, height: int = 180, frames: int = 120) -> None:
+    # writes a raw rgb24 test video: a moving color gradient with a bouncing white square
+    x, y = np.meshgrid(np.arange(width), np.arange(height))
+    with open(filepath, "wb") as file:
+        for n in range(frames):
+            frame = np.stack([(x + 4 * n) % 256, (y + 2 * n) % 256, np.full_like(x, (3 * n) % 256)], axis=-1).astype(np.uint8)
+            px = abs((6 * n) % (2 * (width - 20)) - (width - 20))
+            py = abs((3 * n) % (2 * (height - 20)) - (height - 20))
+            frame[py:py + 20, px:px + 20] = 255
+            file.write(frame.tobytes())
+
+class StageStats:
+    def __init__(self, names: list[str]) -> None:
+        self.latencies = {name: list() for name in names}
+        self.frames = 0
+        self.dropped = 0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.latencies[name].append(seconds)
+
+    def drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        lines = [f"{self.frames} frames shown, {self.dropped} dropped, {self.frames / elapsed:.1f} fps in {elapsed:.1f}s"]
+        for name, latencies in self.latencies.items():
+            if latencies:
+                ms = np.array(latencies) * 1000
+                lines.append(f"\t{name:<11} mean {ms.mean():7.2f} ms, p95 {np.percentile(ms, 95):7.2f} ms, max {ms.max():7.2f} ms")
+        return "\n".join(lines)
+
+class AsciiStream:
+    def __init__(self, frames: RawFrameReader, newWidth: int = 80, fps: float = 24.0, mode: str = "truecolor", asciiMask: str = "@%#*+=-:. ",
+                 samplingMethode: str = "area", output: BinaryIO | None = None, engine: BrightnessEngine | None = None) -> None:
+        # pipeline of three threads connected by small queues: decode -> downsample -> render. The stages work on different
+        # frames at the same time, the renderer shows the frames at the target fps and drops frames that are too late
+        self.frames = frames
+        self.fps = fps
+        self.mode = mode
+        self.samplingMethode = samplingMethode
+        self.output = output or sys.stdout.buffer
+        self.downsampler = Downsampler(newWidth=newWidth)
+        self.converter = PXL2ASCII(asciiMask if mode == "ascii" else None)
+        self.engine = engine or BrightnessEngine(levels=len(asciiMask))
+        if mode != "ascii":
+            # the palette table is built on first use, not while the first frames are due
+            paletteLookup(mode)
+        self.stats = StageStats(["decode", "downsample", "render", "frame"])
+        self.decoded = queue.Queue(maxsize=2)
+        self.downsampled = queue.Queue(maxsize=2)
+        # output buffers are reused: one per queue slot plus the ones being written and shown
+        self.buffers = list()
+        self._stop = threading.Event()
+
+    def _decode(self) -> None:
+        try:
+            frames = iter(self.frames)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                frame = next(frames, None)
+                if frame is None:
+                    break
+                self.stats.add("decode", time.perf_counter() - start)
+                if self.frames.live and self.decoded.full():
+                    self.stats.drop()
+                    continue
+                self.decoded.put((frame, time.perf_counter()))
+        finally:
+            self.decoded.put(None)
+
+    def _downsample(self) -> None:
+        try:
+            n = 0
+            while (item := self.decoded.get()) is not None:
+                frame, decodedAt = item
+                start = time.perf_counter()
+                if len(self.buffers) < self.decoded.maxsize + self.downsampled.maxsize + 2:
+                    self.buffers.append(None)
+                index = n % len(self.buffers)
+                self.buffers[index] = self.downsampler.downsampleFrame(frame, self.buffers[index], self.samplingMethode)
+                self.stats.add("downsample", time.perf_counter() - start)
+                self.downsampled.put((self.buffers[index], decodedAt))
+                n += 1
+        finally:
+            self.downsampled.put(None)
+
+    def _render(self, image: np.ndarray) -> bytes:
+        if self.mode == "ascii":
+            text = self.converter.convertBrightnessToAscii(self.engine.brightness(image))
+        else:
+            self.converter.convertRGBToAscii(image[:, :, :3] * 255, colorMode=self.mode)
+            text = self.converter.asciiImage
+        return f"\x1b[H{text}".encode()
+
+    def _frameWaiting(self) -> bool:
+        # whether a downsampled frame (not only the end of the video) is waiting in the queue
+        with self.downsampled.mutex:
+            return bool(self.downsampled.queue) and self.downsampled.queue[0] is not None
+
+    def run(self) -> StageStats:
+        threads = [threading.Thread(target=self._decode, daemon=True), threading.Thread(target=self._downsample, daemon=True)]
+        for thread in threads:
+            thread.start()
+        self.output.write(b"\x1b[2J\x1b[?25l")
+        interval = 1 / self.fps
+        due = None
+        try:
+            while (item := self.downsampled.get()) is not None:
+                image, decodedAt = item
+                now = time.perf_counter()
+                due = now if due is None else due + interval
+                if now > due + interval and self._frameWaiting():
+                    # more than one frame late and a newer frame is ready: skip this one
+                    self.stats.drop()
+                    due = now
+                    continue
+                if due > now:
+                    time.sleep(due - now)
+                else:
+                    # a late frame is shown right away, the next one is due one interval later (the lag doesn't add up)
+                    due = now
+                start = time.perf_counter()
+                self.output.write(self._render(image))
+                self.output.flush()
+                self.stats.add("render", time.perf_counter() - start)
+                self.stats.add("frame", time.perf_counter() - decodedAt)
+                self.stats.frames += 1
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self.output.write(b"\x1b[0m\x1b[?25h\n")
+            self.output.flush()
+        return self.stats
+
+def checkSchedule(delay: float = 0.045, fps: float = 24.0, frames: int = 60) -> tuple[bool, StageStats]:
+    # plays the synthetic video with a downsampling stage slowed down by delay seconds per frame. The stage is slower
+    # than the target fps but no newer frame is ever waiting, so every frame has to be shown
+    with tempfile.TemporaryDirectory() as folder:
+        filepath = f"{folder}/synthetic.rgb"
+        syntheticVideo(filepath, frames=frames)
+        with open(filepath, "rb") as file:
+            stream = AsciiStream(RawFrameReader(file, 320, 180), newWidth=40, fps=fps, output=io.BytesIO())
+            downsample = stream.downsampler.downsampleFrame
+
+            def slowDownsample(*args) -> np.ndarray:
+                time.sleep(delay)
+                return downsample(*args)
+
+            stream.downsampler.downsampleFrame = slowDownsample
+            stats = stream.run()
+    return stats.frames == frames and stats.dropped == 0, stats
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if not argv:
+        print("Play a video as ascii/ ansi colored text in the terminal. Usage:\n\n"
+              "\tpython stream.py <video file | raw .rgb file | - (raw rgb24 pipe on stdin)> [options]\n\n"
+              "\t-w width\tWidth in characters (2 per pixel in color modes). Defaults to 80.\n"
+              "\t-f fps\t\tTarget frames per second. Defaults to 24.\n"
+              "\t-m mode\t\ttruecolor, 256, 16 or ascii. Defaults to truecolor.\n"
+              "\t-d dither\tDithering of the ascii mode: bayer or floyd-steinberg. Defaults to none.\n"
+              "\t-g gamma\tGamma of the ascii mode brightness (> 1 brightens the mid tones). Defaults to 1.\n"
+              "\t-k kernel\tDownsampling: area, bilinear, lanczos, sub-sampling or box-sampling. Defaults to area.\n"
+              "\t-s WxH\t\tFrame size of raw videos and pipes, e.g. 640x480.\n"
+              "\t-l\t\tLive pipe (e.g. a webcam): drop frames while the pipeline is busy instead of waiting.\n"
+              "\t-synthetic file\tWrite a synthetic raw test video (320x180, 120 frames) and exit.\n"
+              "\t-check\t\tPlay the synthetic video with a slow downsampling stage and check that no frame is dropped.\n\n"
+              "A webcam can be piped with: ffmpeg -f v4l2 -i /dev/video0 -f rawvideo -pix_fmt rgb24 - | python stream.py - -s 640x480 -l")
+        exit(1)
+    if argv[0] == "-check":
+        passed, stats = checkSchedule()
+        print(f"{'ok' if passed else 'FAILED'}: {stats.summary()}")
+        exit(0 if passed else 1)
+    if argv[0] == "-synthetic":
+        syntheticVideo(argv[1])
+        print(f"Wrote synthetic video '{argv[1]}' (320x180, 120 frames), play it with: python stream.py {argv[1]} -s 320x180")
+        exit(0)
+
+    filepath, width, fps, mode, kernel, size, live = argv[0], 80, 24.0, "truecolor", "area", None, False
+    dither, gamma = None, 1.0
+    try:
+        i = 1
+        while i < len(argv):
+            if argv[i] == "-l":
+                live = True
+                i += 1
+                continue
+            arg, value = argv[i], argv[i+1]
+            if arg == "-w":
+                width = int(value)
+            elif arg == "-f":
+                fps = float(value)
+            elif arg == "-m":
+                mode = value
+            elif arg == "-k":
+                kernel = value
+            elif arg == "-d":
+                dither = value
+            elif arg == "-g":
+                gamma = float(value)
+            elif arg == "-s":
+                size = tuple(int(n) for n in value.lower().split("x"))
+            else:
+                print(f"Unknown option: {arg}!"); exit(1)
+            i += 2
+    except (IndexError, ValueError):
+        print(f"Please provide a valid value for {argv[i]}!"); exit(1)
+    if mode not in ["truecolor", "256", "16", "ascii"]:
+        print(f"Unknown mode '{mode}'!"); exit(1)
+    if dither not in ["bayer", "floyd-steinberg", None]:
+        print(f"Unknown dithering '{dither}'!"); exit(1)
+    if size is None and (filepath == "-" or filepath.endswith((".rgb", ".raw"))):
+        print("Raw videos and pipes need the frame size (-s WxH)!"); exit(1)
+
+    try:
+        frames = openVideo(filepath, size, live)
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as error:
+        print(error); exit(1)
+    # color modes print every pixel twice, the ascii mode a char and a space
+    try:
+        stats = AsciiStream(frames, newWidth=width // 2, fps=fps, mode=mode, samplingMethode=kernel,
+                            engine=BrightnessEngine(gamma=gamma, dither=dither)).run()
+    finally:
+        frames.close()
+    print(stats.summary())
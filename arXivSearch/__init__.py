@@ -0,0 +1,2 @@
+from arXivSearch.search import search, resolve_listings, archive_map, category_map
+from arXivSearch.sinks import Result, TextSink, JSONLSink, CSVSink, ParquetSink, MemorySink
@@ -0,0 +1,5 @@
+import sys
+
+from arXivSearch.search import main
+
+main(sys.argv[1:])
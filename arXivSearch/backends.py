@@ -0,0 +1,222 @@
+import gzip
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import IO, Iterator
+from urllib.parse import urlencode
+
+if __package__:
+    from .fetcher import Fetcher
+    from .index import SubmissionIndex
+    from .listing import Submission, parse_listing
+    from .matcher import KeywordMatcher
+else:
+    from fetcher import Fetcher
+    from index import SubmissionIndex
+    from listing import Submission, parse_listing
+    from matcher import KeywordMatcher
+
+# matchers of the keyword sets in a worker process (built once per process)
+_matchers = dict()
+
+def parse_page(page: str, keyword_sets: tuple[tuple[str, ...], ...] = ()) -> list[Submission]:
+    """Parses a listing page and matches every submission against all keyword sets. Runs in the worker processes and
+    only returns the compact submission records.
+    """
+    for keywords in keyword_sets:
+        if keywords not in _matchers:
+            _matchers[keywords] = KeywordMatcher(keywords)
+    matchers = [_matchers[keywords] for keywords in keyword_sets]
+    items = list(parse_listing(page))
+    if matchers:
+        items = [item._replace(matches=tuple(tuple(matcher.match(item.title, item.abstract)) for matcher in matchers)) for item in items]
+    return items
+
+class Backend:
+    """Source of the submissions of listings (archive + category paths like 'quant-ph' or 'physics.optics') per day.
+    """
+    def __init__(self, today: datetime, index: SubmissionIndex | None = None) -> None:
+        self.today = today
+        self.index = index
+
+    def is_final(self, day: datetime) -> bool:
+        """Listings of past days do not change anymore.
+        """
+        return day.date() < self.today.date()
+
+    def fetch(self, pairs: list[tuple[datetime, str]]) -> Iterator[tuple[list[Submission], bool]]:
+        """Yields (submissions, final) for every (day, listing) pair in the given order.
+        """
+        raise NotImplementedError
+
+class CatchupBackend(Backend):
+    """Scrapes the html catchup pages of arXiv, one page per listing and day. All pages are fetched concurrently and days
+    that are already in the index are read from there. With `processes` the pages are parsed (and matched against the
+    keyword sets) in a process pool while the next pages are downloaded.
+    """
+    url = "https://arxiv.org/catchup"
+
+    def __init__(self, today: datetime, fetcher: Fetcher, index: SubmissionIndex | None = None, processes: int = 0,
+                 keyword_sets: list[list[str]] | None = None) -> None:
+        super().__init__(today, index)
+        self.fetcher = fetcher
+        self.processes = processes
+        self.keyword_sets = tuple(tuple(keywords) for keywords in keyword_sets or ())
+
+    def _parse(self, pages: Iterator[tuple[str, str]]) -> Iterator[list[Submission]]:
+        """Yields the parsed pages in order. The pool gets at most two pages per process ahead of the consumer.
+        """
+        if self.processes < 2:
+            for _, page in pages:
+                yield list(parse_listing(page))
+            return
+        with ProcessPoolExecutor(self.processes) as pool:
+            pending = deque()
+            for _, page in pages:
+                pending.append(pool.submit(parse_page, page, self.keyword_sets))
+                if len(pending) > 2 * self.processes:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def fetch(self, pairs: list[tuple[datetime, str]]) -> Iterator[tuple[list[Submission], bool]]:
+        urls = [f"{self.url}/{path}/{day.year}-{day.month:02}-{day.day:02}?abs=True" for day, path in pairs]
+        final = {url for (day, _), url in zip(pairs, urls) if self.is_final(day)}
+        indexed = {url for (day, path), url in zip(pairs, urls) if url in final and self.index.has_day(path, day)} if self.index else set()
+        pages = self._parse(self.fetcher.fetch_all([url for url in urls if url not in indexed], final))
+        for (day, path), url in zip(pairs, urls):
+            if url in indexed:
+                items = self.index.day(path, day)
+            else:
+                items = next(pages)
+                if self.index is not None:
+                    self.index.add_day(path, day, items, final=url in final)
+            yield items, url in final
+
+# OAI-PMH sets of the archives, all physics archives are subsets of 'physics'
+physics_archives = ["astro-ph", "cond-mat", "gr-qc", "hep-ex", "hep-lat", "hep-ph", "hep-th", "math-ph", "nlin", "nucl-ex", "nucl-th", "physics", "quant-ph"]
+oai = "{http://www.openarchives.org/OAI/2.0/}"
+arxiv = "{http://arxiv.org/OAI/arXiv/}"
+
+class OAIBackend(Backend):
+    """Reads the bulk metadata of arXiv (OAI-PMH, metadata format 'arXiv') either from the OAI-PMH endpoint or from a local
+    file with the same xml format (e.g. a saved ListRecords response, also gzipped). Records are streamed through an
+    iterative xml parser. The endpoint is harvested once per archive (following resumption tokens) instead of one request
+    per day.
+
+    The metadata has no announcement dates, so a submission belongs to the day it was created (section 'New' in its primary
+    category, 'Cross' in all others) and, if it has a newer version, also to the day of the last update (section 'Replace').
+    Days of intermediate versions are not part of the metadata.
+
+    OAI-PMH selects records by their datestamp, the day of the last change of the metadata (a new version, an added journal
+    reference, ...), which can be long after the searched days. So the endpoint is harvested from the first searched day
+    without an upper bound and the records are sorted into the days by their created/ updated dates. For old date ranges
+    this downloads all records changed since then.
+
+    Records only appear in the metadata once they are announced (usually the next evening, later over weekends and holidays),
+    so a day only counts as finished `lag` days after it. The days are added to the index as 'oai:<listing>', apart from the
+    catchup listings (which are complete when they are finished and use the announcement days).
+    """
+    url = "https://export.arxiv.org/oai2"
+
+    def __init__(self, today: datetime, source: str, fetcher: Fetcher | None = None, index: SubmissionIndex | None = None, lag: int = 7) -> None:
+        super().__init__(today, index)
+        self.lag = lag
+        self.source = source
+        self.remote = source == "oai" or source.startswith(("http://", "https://"))
+        if source.startswith(("http://", "https://")):
+            self.url = source
+        self.fetcher = fetcher
+
+    def is_final(self, day: datetime) -> bool:
+        """Days of the metadata can still get records until they are `lag` days old.
+        """
+        return day.date() <= self.today.date() - timedelta(days=self.lag)
+
+    @staticmethod
+    def set_spec(path: str) -> str:
+        archive = path.split(".")[0]
+        return f"physics:{archive}" if archive in physics_archives else archive
+
+    def _open(self, params: dict) -> IO[bytes]:
+        response = self.fetcher.request(f"{self.url}?{urlencode(params)}", stream=True)
+        response.raw.decode_content = True
+        return response.raw
+
+    def _harvest(self, spec: str, start: date) -> Iterator[ET.Element]:
+        """Yields all records of a set that were changed since the given day, following the resumption tokens.
+        """
+        params = {"verb": "ListRecords", "metadataPrefix": "arXiv", "set": spec, "from": start.isoformat()}
+        while params:
+            stream = self._open(params)
+            params = None
+            for record, token in self._records(stream):
+                if record is not None:
+                    yield record
+                elif token:
+                    params = {"verb": "ListRecords", "resumptionToken": token}
+
+    @staticmethod
+    def _records(stream: IO[bytes]) -> Iterator[tuple[ET.Element | None, str | None]]:
+        """Streams through an OAI-PMH response. Yields (record, None) for every record and (None, token) for the resumption token.
+        """
+        for _, element in ET.iterparse(stream, events=("end",)):
+            if element.tag == f"{oai}record":
+                yield element, None
+                element.clear()
+            elif element.tag == f"{oai}resumptionToken":
+                yield None, (element.text or "").strip()
+
+    @staticmethod
+    def _entries(record: ET.Element) -> Iterator[tuple[date, str, Submission]]:
+        """Yields (day, category, submission) for every category of a record on the day it was created and, if it was
+        replaced, on the day of the last update.
+        """
+        meta = record.find(f"{oai}metadata/{arxiv}arXiv")
+        if meta is None:
+            return
+        text = lambda tag: " ".join((meta.findtext(f"{arxiv}{tag}") or "").split())
+        categories = text("categories").split()
+        created, updated = text("created"), text("updated")
+        days = [(datetime.strptime(created, "%Y-%m-%d").date(), None)]
+        if updated:
+            days.append((datetime.strptime(updated, "%Y-%m-%d").date(), "Replace"))
+        for day, section in days:
+            for i, category in enumerate(categories):
+                yield day, category, Submission(section or ("New" if i == 0 else "Cross"), f"/abs/{text('id')}", text("title"), text("abstract"), tuple(categories))
+
+    def _collect(self, records: Iterator[ET.Element], wanted: dict[tuple[date, str], list[Submission]]) -> None:
+        """Sorts the records into the wanted (day, listing) lists. A record is added once per listing and day in its most relevant
+        section (records can be part of several sets and have several categories of the same archive).
+        """
+        paths = {path for _, path in wanted}
+        seen = set()
+        for record in records:
+            for day, category, item in self._entries(record):
+                for path in paths:
+                    if (day, path) in wanted and (category == path or category.startswith(f"{path}.")) and (item.link, path, day) not in seen:
+                        seen.add((item.link, path, day))
+                        wanted[day, path].append(item)
+
+    def fetch(self, pairs: list[tuple[datetime, str]]) -> Iterator[tuple[list[Submission], bool]]:
+        if not pairs:
+            return
+        # the local file or the endpoint (once per set) is read for all days at once
+        wanted = {(day.date(), path): list() for day, path in pairs}
+        if not self.remote:
+            opener = gzip.open if self.source.endswith(".gz") else open
+            with opener(self.source, "rb") as file:
+                self._collect((record for record, _ in self._records(file) if record is not None), wanted)
+        else:
+            first = min(day for day, _ in pairs).date()
+            for spec in dict.fromkeys(self.set_spec(path) for _, path in pairs):
+                self._collect(self._harvest(spec, first), wanted)
+        for day, path in pairs:
+            yield self._store(day, path, wanted[day.date(), path])
+
+    def _store(self, day: datetime, path: str, items: list[Submission]) -> tuple[list[Submission], bool]:
+        final = self.is_final(day)
+        if self.index is not None:
+            self.index.add_day(f"oai:{path}", day, items, final=final)
+        return items, final
@@ -0,0 +1,194 @@
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+if __package__:
+    from .fetcher import Fetcher
+    from .listing import parse_listing
+    from .matcher import KeywordMatcher
+    from .search import search
+    from .sinks import CSVSink, JSONLSink, Result, TextSink
+else:
+    from fetcher import Fetcher
+    from listing import parse_listing
+    from matcher import KeywordMatcher
+    from search import search
+    from sinks import CSVSink, JSONLSink, Result, TextSink
+
+# recorded catchup pages that are replayed for every listing and day (in turns)
+fixtures = sorted((Path(__file__).parent / "fixtures").glob("catchup_*.html"))
+# keywords for the keyword count runs, the first ones are the defaults of search.py
+vocabulary = ["integrated", "chip", "photonic", "waveguide", "resonator", "silicon nitride", "entanglement", "qubit", "laser",
+              "superconducting", "topological", "lattice", "spin", "ring", "PIC", "photonics", "optics", "quantum dot", "cavity",
+              "squeezing", "interferometer", "single photon", "frequency comb", "modulator", "detector", "metasurface", "plasmonic",
+              "nonlinear", "dispersion", "soliton"]
+
+class ReplayResponse:
+    """Minimal stand-in for a `requests.Response` of a recorded page.
+    """
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.status_code = 200
+        self.ok = True
+        self.headers = dict()
+
+class ReplaySession:
+    """Stand-in for the `requests.Session` of a fetcher that serves the recorded pages instead of downloading them. Every
+    url gets one of the pages (always the same), `latency` simulates the network round trip in seconds.
+    """
+    def __init__(self, pages: list[str], latency: float = 0.0) -> None:
+        self.pages = pages
+        self.latency = latency
+        self.requests = 0
+
+    def get(self, url: str, headers: dict | None = None, **_) -> ReplayResponse:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return ReplayResponse(self.pages[sum(url.encode()) % len(self.pages)])
+
+    def close(self) -> None:
+        pass
+
+def replay_fetcher(pages: list[str], workers: int, latency: float) -> Fetcher:
+    """Helper function to create a fetcher (without cache and pause) that replays the recorded pages.
+    """
+    fetcher = Fetcher(workers=workers, interval=0.0, cache=None)
+    fetcher.session.close()
+    fetcher.session = ReplaySession(pages, latency)
+    return fetcher
+
+def measure(stage: Callable[[], object], repeat: int) -> tuple[float, float, object]:
+    """Helper function to run a stage `repeat` times. Returns the best time in seconds, the peak memory in MB (of an extra
+    run with tracemalloc, which would slow down the timed runs) and the output of the stage.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = stage()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    stage()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return best, peak, output
+
+def run(days: int, keywords: list[str], pages: list[str], workers: int = 4, latency: float = 0.0, repeat: int = 3) -> dict:
+    """Benchmarks the stages of one search of `days` days with the given keywords. The stages get the output of the previous
+    stage, so every timing only contains its own work. 'search' is the whole pipeline as it is run by search.py.
+    """
+    first = datetime(2024, 10, 1)
+    dates = [first + timedelta(days=n) for n in range(days)]
+    urls = [f"https://arxiv.org/catchup/quant-ph/{day.year}-{day.month:02}-{day.day:02}?abs=True" for day in dates]
+    results = {"days": days, "keywords": len(keywords)}
+
+    def fetch() -> list[str]:
+        fetcher = replay_fetcher(pages, workers, latency)
+        return [text for _, text in fetcher.fetch_all(urls)]
+
+    def parse() -> list[list]:
+        return [list(parse_listing(text)) for text in texts]
+
+    def match() -> list[dict]:
+        matcher = KeywordMatcher(keywords)
+        found = list()
+        for items in parsed:
+            day = {"New": list(), "Cross": list(), "Replace": list()}
+            for item in items:
+                words = matcher.match(item.title, item.abstract)
+                if words:
+                    day[item.section].append(Result(f"https://arxiv.org/{item.link}", item.title, item.abstract, words, list(item.subjects)))
+            found.append(day)
+        return found
+
+    def write() -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            outputs = [TextSink(f"{folder}/out.txt", keywords), JSONLSink(f"{folder}/out.jsonl"), CSVSink(f"{folder}/out.csv")]
+            for output in outputs:
+                output.begin([("Quantum Physics", "", "quant-ph")], dates[0], dates[-1])
+            for day, day_results in zip(dates, matched):
+                for output in outputs:
+                    output.write_day(day, day_results)
+            for output in outputs:
+                output.close()
+
+    def pipeline() -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            search("quant-ph", since=dates[0], until=dates[-1], keywords=keywords, sink=[TextSink(f"{folder}/out.txt", keywords)],
+                   cache=None, fetcher=replay_fetcher(pages, workers, latency))
+
+    results["fetch"], results["fetch_mb"], texts = measure(fetch, repeat)
+    results["parse"], results["parse_mb"], parsed = measure(parse, repeat)
+    results["match"], results["match_mb"], matched = measure(match, repeat)
+    results["write"], results["write_mb"], _ = measure(write, repeat)
+    results["search"], results["search_mb"], _ = measure(pipeline, repeat)
+    results["items"] = sum(len(items) for items in parsed)
+    results["matches"] = sum(len(items) for day in matched for items in day.values())
+    results["items_per_s"] = results["items"] / results["search"] if results["search"] else float("inf")
+    return results
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    day_counts = [1, 7, 30]
+    keyword_counts = [3, 10, 30]
+    workers = 4
+    latency = 0.0
+    repeat = 3
+    outfile = None
+    baseline = None
+    try:
+        i = 0
+        while i < len(argv):
+            arg = argv[i]
+            if arg in ["-days", "-d"]:
+                day_counts = [int(n) for n in argv[i+1].split(",")]
+            elif arg in ["-keywords", "-k"]:
+                keyword_counts = [int(n) for n in argv[i+1].split(",")]
+            elif arg in ["-workers", "-w"]:
+                workers = int(argv[i+1])
+            elif arg in ["-latency", "-l"]:
+                latency = float(argv[i+1])
+            elif arg in ["-repeat", "-r"]:
+                repeat = max(1, int(argv[i+1]))
+            elif arg in ["-save", "-s"]:
+                outfile = argv[i+1]
+            elif arg in ["-compare", "-c"]:
+                baseline = argv[i+1]
+            else:
+                print("Offline benchmark of the search pipeline with the recorded catchup pages in 'fixtures'. Usage:\n\n"
+                      "\tpython benchmark.py [-d days,...] [-k keywords,...] [-w workers] [-l latency] [-r repeat] [-s file] [-c file]\n\n"
+                      "-d and -k are the day and keyword counts to run (defaults 1,7,30 and 3,10,30), -l a simulated network latency\n"
+                      "per page in seconds (default 0), -r the number of timed runs (the best one counts, default 3). -s saves the\n"
+                      "results as json and -c compares them with saved results.")
+                exit(1)
+            i += 2
+    except (IndexError, ValueError):
+        print(f"Please provide a valid value for {argv[i]}!"); exit(1)
+    if max(keyword_counts) > len(vocabulary):
+        print(f"At most {len(vocabulary)} keywords are available!"); exit(1)
+
+    pages = [page.read_text(encoding="utf-8") for page in fixtures]
+    previous = dict()
+    if baseline:
+        with open(baseline, encoding="utf-8") as file:
+            previous = {(entry["days"], entry["keywords"]): entry for entry in json.load(file)}
+    stages = ["fetch", "parse", "match", "write", "search"]
+    print(f"{'days':>5} {'keys':>5} {'items':>6} " + " ".join(f"{stage + ' ms':>10}" for stage in stages) + f" {'items/s':>10} {'peak MB':>8}")
+    entries = list()
+    for days in day_counts:
+        for count in keyword_counts:
+            entry = run(days, vocabulary[:count], pages, workers, latency, repeat)
+            entries.append(entry)
+            print(f"{days:>5} {count:>5} {entry['items']:>6} " + " ".join(f"{entry[stage] * 1000:>10.2f}" for stage in stages) +
+                  f" {entry['items_per_s']:>10.0f} {max(entry[f'{stage}_mb'] for stage in stages):>8.2f}")
+            old = previous.get((days, count))
+            if old:
+                print(f"{'':>18}" + " ".join(f"{(entry[stage] / old[stage] - 1) * 100 if old[stage] else 0.0:>+9.1f}%" for stage in stages))
+    if outfile:
+        with open(outfile, "w", encoding="utf-8") as file:
+            json.dump(entries, file, indent=1)
+        print(f"Saved benchmark results to '{outfile}'.")
@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+class CachedPage(NamedTuple):
+    text: str
+    etag: str | None
+    last_modified: str | None
+    final: bool
+    fetched: float
+
+class PageCache:
+    """Persistent SQLite cache for fetched webpages, keyed by url (i.e. archive/category/date for the catchup pages).
+
+    Pages marked as final (listings of days that are over) are served from disk without any request. All other pages are
+    revalidated with ETag/Last-Modified once they are older than `fresh` seconds. Entries older than `max_age` days are
+    dropped and the least recently used entries are dropped while the cache is bigger than `max_size` MB.
+    """
+    def __init__(self, path: str, max_age: float | None = 90, max_size: float | None = 200, fresh: float = 600) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.max_size = max_size
+        self.fresh = fresh
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, text TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                         "final INTEGER NOT NULL, fetched REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)")
+        self._db.commit()
+        self.evict()
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            row = self._db.execute("SELECT text, etag, last_modified, final, fetched FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+            return CachedPage(row[0], row[1], row[2], bool(row[3]), row[4])
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.final or time.time() - page.fetched < self.fresh
+
+    def put(self, url: str, text: str, etag: str | None = None, last_modified: str | None = None, final: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (url, text, etag, last_modified, int(final), now, now, len(text.encode())))
+            self._db.commit()
+
+    def touch(self, url: str, revalidated: bool = False, final: bool = False) -> None:
+        """Marks an entry as used (and as up to date after a `304 Not Modified` answer if `revalidated`).
+        """
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._db.execute("UPDATE pages SET accessed = ?, fetched = ?, final = MAX(final, ?) WHERE url = ?", (now, now, int(final), url))
+            else:
+                self._db.execute("UPDATE pages SET accessed = ? WHERE url = ?", (now, url))
+            self._db.commit()
+
+    def evict(self) -> None:
+        with self._lock:
+            if self.max_age is not None:
+                self._db.execute("DELETE FROM pages WHERE fetched < ?", (time.time() - self.max_age * 86400,))
+            if self.max_size is not None:
+                limit = self.max_size * 1024**2
+                total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+                for url, size in self._db.execute("SELECT url, size FROM pages ORDER BY accessed").fetchall():
+                    if total <= limit:
+                        break
+                    self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                    total -= size
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,171 @@
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+if __package__:
+    from .cache import PageCache
+    from .fetcher import Fetcher, FetchError
+else:
+    from cache import PageCache
+    from fetcher import Fetcher, FetchError
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Answers depending on the path (the rest of the path only makes the urls unique):
+
+    /ok/...             200
+    /flaky/<n>/...      503 for the first n requests, then 200
+    /throttle/<s>/...   429 with 'Retry-After: <s>' for the first request, then 200
+    /missing/...        404
+    /etag/...           200 with an ETag and Last-Modified, 304 if the request revalidates them
+    /slow/<s>/...       200 after <s> seconds
+    """
+    etag = '"v1"'
+    last_modified = "Tue, 01 Oct 2024 00:00:00 GMT"
+
+    def do_GET(self) -> None:
+        server = self.server
+        path = urlsplit(self.path).path
+        kind, _, rest = path.strip("/").partition("/")
+        with server.lock:
+            count = server.counts[path]
+            server.counts[path] += 1
+            server.times[path].append(time.monotonic())
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if kind == "flaky" and count < int(rest.split("/")[0]):
+                self.answer(503)
+            elif kind == "throttle" and count == 0:
+                self.answer(429, {"Retry-After": rest.split("/")[0]})
+            elif kind == "missing":
+                self.answer(404)
+            elif kind == "etag":
+                if self.headers.get("If-None-Match") == self.etag or self.headers.get("If-Modified-Since") == self.last_modified:
+                    self.answer(304)
+                else:
+                    self.answer(200, {"ETag": self.etag, "Last-Modified": self.last_modified}, f"page {path}")
+            elif kind == "slow":
+                time.sleep(float(rest.split("/")[0]))
+                self.answer(200, body=f"page {path}")
+            elif kind in ["ok", "flaky", "throttle"]:
+                self.answer(200, body=f"page {path}")
+            else:
+                self.answer(404)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def answer(self, status: int, headers: dict | None = None, body: str = "") -> None:
+        data = body.encode()
+        self.send_response(status)
+        for key, value in (headers or dict()).items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+class FakeServer(ThreadingHTTPServer):
+    """Local http server with injected failures (see `FakeHandler`) that counts the requests per path and the maximum
+    number of requests it answered at the same time. Runs in a background thread while used as a context manager.
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), FakeHandler)
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+        self.times = defaultdict(list)
+        self.active = 0
+        self.max_active = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self) -> "FakeServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.shutdown()
+        self.server_close()
+
+def check(server: FakeServer) -> list[tuple[str, bool, str]]:
+    """Runs the fetcher against the fake server. Returns (name, passed, details) for every check.
+    """
+    results = list()
+    url = server.url
+
+    # temporary errors are retried with exponential backoff (jitter: between half and the full delay)
+    fetcher = Fetcher(workers=1, interval=0.0, cache=None, backoff=0.2)
+    text = fetcher.get(f"{url}/flaky/2/a")
+    times = server.times["/flaky/2/a"]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    results.append(("retries", text == "page /flaky/2/a" and server.counts["/flaky/2/a"] == 3 and fetcher.stats.retries == 2,
+                    f"{server.counts['/flaky/2/a']} requests, {fetcher.stats.retries} retries"))
+    results.append(("backoff", len(gaps) == 2 and gaps[0] >= 0.1 and gaps[1] >= 0.2, ", ".join(f"{gap:.2f}s" for gap in gaps)))
+
+    # Retry-After is respected even if the backoff is shorter
+    fetcher.get(f"{url}/throttle/1/a")
+    times = server.times["/throttle/1/a"]
+    results.append(("retry-after", len(times) == 2 and times[1] - times[0] >= 1.0, f"waited {times[-1] - times[0]:.2f}s"))
+    fetcher.close()
+
+    # too many failures and client errors raise a FetchError (404 without retrying)
+    fetcher = Fetcher(workers=1, interval=0.0, cache=None, retries=2, backoff=0.05)
+    for path, requests in [("/flaky/9/b", 3), ("/missing/a", 1)]:
+        try:
+            fetcher.get(f"{url}{path}")
+            results.append((f"error {path}", False, "no FetchError"))
+        except FetchError as error:
+            results.append((f"error {path}", server.counts[path] == requests, f"{server.counts[path]} requests: {error}"))
+    fetcher.close()
+
+    # at most `per_host` requests run at the same time
+    fetcher = Fetcher(workers=6, interval=0.0, cache=None, per_host=2)
+    server.max_active = 0
+    pages = list(fetcher.fetch_all([f"{url}/slow/0.2/{n}" for n in range(8)]))
+    results.append(("per-host limit", len(pages) == 8 and server.max_active == 2, f"{server.max_active} concurrent requests"))
+    fetcher.close()
+
+    # pages in the cache are revalidated with ETag/Last-Modified, a 304 answer serves the cached page
+    with tempfile.TemporaryDirectory() as folder:
+        cache = PageCache(f"{folder}/cache.sqlite", fresh=0)
+        fetcher = Fetcher(workers=1, interval=0.0, cache=cache)
+        first, second = fetcher.get(f"{url}/etag/a"), fetcher.get(f"{url}/etag/a")
+        results.append(("304 revalidation", first == second == "page /etag/a" and fetcher.stats.statuses[304] == 1,
+                        f"statuses {dict(fetcher.stats.statuses)}"))
+        fetcher.close()
+        cache.close()
+    return results
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if argv and argv[0] not in ["-serve", "-s"]:
+        print("Local http server with injected failures (503, 429 with Retry-After, 404, ETag/304, slow answers). Usage:\n\n"
+              "\tpython fakeserver.py\t\t\tChecks retries, backoff, per-host limits, 304 revalidation and errors of the fetcher.\n"
+              "\tpython fakeserver.py -s [port]\t\tOnly serves (see FakeHandler for the paths) until ctrl+c.")
+        exit(1)
+    if argv:
+        with FakeServer(int(argv[1]) if len(argv) > 1 else 8000) as server:
+            print(f"Serving on {server.url} ...")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+        exit(0)
+
+    with FakeServer() as server:
+        results = check(server)
+    for name, passed, details in results:
+        print(f"{'ok' if passed else 'FAILED':<7} {name:<18} {details}")
+    exit(0 if all(passed for _, passed, _ in results) else 1)
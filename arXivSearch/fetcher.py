@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import urlsplit
+
+if __package__:
+    from .cache import PageCache
+else:
+    from cache import PageCache
+
+class RateLimiter:
+    """Spaces out the start of requests so that at most one request is started every `interval` seconds (shared by all threads).
+    """
+    def __init__(self, interval: float = 0.0) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+class FetchError(Exception):
+    """A webpage could not be fetched (also after retrying).
+    """
+
+class FetchStats:
+    """Latency and retry metrics of a fetcher (shared by all threads).
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.statuses = Counter()
+        self.latencies = list()
+
+    def record(self, latency: float, status: int | None) -> None:
+        """Records one request, `status` is None if the request failed without a response (timeout, connection error).
+        """
+        with self._lock:
+            self.requests += 1
+            self.statuses[status or "error"] += 1
+            self.latencies.append(latency)
+
+    def retried(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def failed(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def __str__(self) -> str:
+        if not self.latencies:
+            return "no requests"
+        latencies = sorted(self.latencies)
+        p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items(), key=str))
+        return (f"{self.requests} requests ({statuses}), {self.retries} retries, {self.failures} failed, "
+                f"latency median {p(0.5):.2f}s, p95 {p(0.95):.2f}s, max {latencies[-1]:.2f}s")
+
+class Fetcher:
+    """Fetches webpages concurrently with a bounded thread pool and one shared (pooled) session. If a cache is given, cached
+    pages are served from disk and only pages that might have changed are revalidated.
+
+    Every request has a (connect, read) timeout. Timeouts, connection errors and the status codes in `retry_statuses` are
+    retried up to `retries` times with exponential backoff and jitter (a Retry-After header is respected). At most
+    `per_host` requests run at the same time per host. Latencies and retries are collected in `stats`.
+    """
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(self, workers: int = 4, interval: float = 0.5, cache: PageCache | None = None, timeout: tuple[float, float] = (10.0, 60.0),
+                 retries: int = 4, backoff: float = 1.0, max_backoff: float = 60.0, per_host: int | None = None) -> None:
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.limiter = RateLimiter(interval)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.per_host = per_host or self.workers
+        self.stats = FetchStats()
+        self._hosts = dict()
+        self._hosts_lock = threading.Lock()
+        # requests is only imported when something is actually downloaded (keeps importing the package fast)
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._errors = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @contextmanager
+    def _host(self, url: str) -> Iterator[None]:
+        """Limits the number of concurrent requests to the host of the url.
+        """
+        host = urlsplit(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            semaphore = self._hosts[host]
+        with semaphore:
+            yield
+
+    def _delay(self, attempt: int, retry_after: str | None) -> float:
+        """Exponential backoff with jitter (between half and the full delay), at least as long as the server asked for.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        if retry_after is not None and retry_after.strip().isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+    def request(self, url: str, headers: dict | None = None, stream: bool = False):
+        """Sends a GET request (respecting the pause between requests, the host limit and the timeouts) and retries it if it
+        failed temporarily. Returns the response (status below 400 or 304) or raises a FetchError.
+        """
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            start = time.monotonic()
+            retry_after = None
+            try:
+                with self._host(url):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+            except self._errors as error:
+                self.stats.record(time.monotonic() - start, None)
+                problem = repr(error)
+            else:
+                self.stats.record(time.monotonic() - start, response.status_code)
+                if response.status_code not in self.retry_statuses:
+                    if response.status_code >= 400:
+                        self.stats.failed()
+                        raise FetchError(f"Could not fetch '{url}': HTTP {response.status_code} {response.reason}")
+                    return response
+                problem = f"HTTP {response.status_code} {response.reason}"
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+            if attempt == self.retries:
+                self.stats.failed()
+                raise FetchError(f"Could not fetch '{url}' after {self.retries + 1} attempts: {problem}")
+            self.stats.retried()
+            time.sleep(self._delay(attempt, retry_after))
+
+    def get(self, url: str, final: bool = False) -> str:
+        """Returns the text of the webpage. `final` marks pages that will not change anymore (e.g. listings of past days).
+        """
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is not None and self.cache.is_fresh(cached):
+            self.cache.touch(url)
+            return cached.text
+
+        headers = dict()
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        response = self.request(url, headers)
+        if cached is not None and response.status_code == 304:
+            self.cache.touch(url, revalidated=True, final=final)
+            return cached.text
+
+        if self.cache is not None:
+            self.cache.put(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"), final)
+        return response.text
+
+    def fetch_all(self, urls: list[str], final: set[str] | None = None) -> Iterator[tuple[str, str]]:
+        """Fetches all urls in parallel and yields (url, text) pairs in the order of the given urls as soon as they are available.
+        Urls in `final` are cached for good once they were fetched. At most two pages per worker are fetched ahead of the
+        consumer, so unread pages don't pile up in memory.
+        """
+        final = final or set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            try:
+                for url in urls:
+                    pending.append((url, pool.submit(self.get, url, url in final)))
+                    if len(pending) > 2 * self.workers:
+                        url, future = pending.popleft()
+                        yield url, future.result()
+                while pending:
+                    url, future = pending.popleft()
+                    yield url, future.result()
+            finally:
+                # the consumer stopped early (or a page failed): pages that were not started yet are not fetched anymore
+                for _, future in pending:
+                    future.cancel()
+
+    def close(self) -> None:
+        self.session.close()
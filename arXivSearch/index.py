@@ -0,0 +1,117 @@
+import sqlite3
+import sys
+from datetime import date
+from typing import Iterable, NamedTuple
+
+if __package__:
+    from .listing import Submission
+else:
+    from listing import Submission
+
+class Hit(NamedTuple):
+    link: str
+    title: str
+    abstract: str
+    section: str
+    date: str
+    listing: str
+    score: float
+
+class SubmissionIndex:
+    """Local full text index (SQLite FTS5) of all harvested submissions. Days are ingested incrementally per listing
+    (archive + category, e.g. 'quant-ph' or 'physics.optics') and can be queried with BM25 ranking (titles weigh more than
+    abstracts). Queries use the FTS5 syntax, i.e. phrases in double quotes, AND, OR, NOT, NEAR(...) and prefix*.
+
+    Days read from the bulk metadata are stored as listing 'oai:<listing>', so they are never served as catchup pages.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS submissions (id INTEGER PRIMARY KEY, listing TEXT NOT NULL, date TEXT NOT NULL,
+                section TEXT NOT NULL, link TEXT NOT NULL, title TEXT NOT NULL, abstract TEXT NOT NULL, subjects TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS submissions_day ON submissions (listing, date);
+            CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts USING fts5(title, abstract, content='submissions', content_rowid='id');
+            CREATE TRIGGER IF NOT EXISTS submissions_insert AFTER INSERT ON submissions BEGIN
+                INSERT INTO submissions_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+            END;
+            CREATE TRIGGER IF NOT EXISTS submissions_delete AFTER DELETE ON submissions BEGIN
+                INSERT INTO submissions_fts (submissions_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+            END;
+            CREATE TABLE IF NOT EXISTS days (listing TEXT NOT NULL, date TEXT NOT NULL, final INTEGER NOT NULL, PRIMARY KEY (listing, date));
+        """)
+        self._db.commit()
+
+    def has_day(self, listing: str, day: date) -> bool:
+        """Checks if a finished day of a listing is already in the index (the current day is never finished).
+        """
+        row = self._db.execute("SELECT final FROM days WHERE listing = ? AND date = ?", (listing, day.strftime("%Y-%m-%d"))).fetchone()
+        return row is not None and bool(row[0])
+
+    def add_day(self, listing: str, day: date, items: Iterable[Submission], final: bool = True) -> None:
+        """Stores all submissions of one day of a listing. A day that was added before is replaced.
+        """
+        key = day.strftime("%Y-%m-%d")
+        with self._db:
+            self._db.execute("DELETE FROM submissions WHERE listing = ? AND date = ?", (listing, key))
+            self._db.executemany("INSERT INTO submissions (listing, date, section, link, title, abstract, subjects) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 ((listing, key, *item[:4], " ".join(item.subjects)) for item in items))
+            self._db.execute("INSERT OR REPLACE INTO days VALUES (?, ?, ?)", (listing, key, int(final)))
+
+    def day(self, listing: str, day: date) -> list[Submission]:
+        """Returns the submissions of one day of a listing in the order of the listing page.
+        """
+        rows = self._db.execute("SELECT section, link, title, abstract, subjects FROM submissions WHERE listing = ? AND date = ? ORDER BY id",
+                                (listing, day.strftime("%Y-%m-%d")))
+        return [Submission(*row[:4], tuple(row[4].split())) for row in rows]
+
+    def search(self, query: str, listing: str | None = None, since: date | None = None, until: date | None = None, limit: int | None = 50) -> list[Hit]:
+        """Returns the submissions matching the query, best matches first. A listing also matches its days from the bulk metadata.
+        """
+        sql = ("SELECT s.link, s.title, s.abstract, s.section, s.date, s.listing, bm25(submissions_fts, 2.0, 1.0) AS score "
+               "FROM submissions_fts JOIN submissions s ON s.id = submissions_fts.rowid WHERE submissions_fts MATCH ?")
+        params = [query]
+        if listing is not None:
+            sql += " AND s.listing IN (?, ?)"
+            params += [listing, f"oai:{listing}"]
+        if since is not None:
+            sql += " AND s.date >= ?"
+            params.append(since.strftime("%Y-%m-%d"))
+        if until is not None:
+            sql += " AND s.date <= ?"
+            params.append(until.strftime("%Y-%m-%d"))
+        sql += " ORDER BY score"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        # bm25 is negative in SQLite (lower is better), flip it so that higher scores are better
+        return [Hit(*row[:-1], -row[-1]) for row in self._db.execute(sql, params)]
+
+    def close(self) -> None:
+        self._db.close()
+
+def keywords_query(keywords: list[str]) -> str:
+    """Turns a list of keywords into a FTS5 query matching any of them (each keyword as a phrase).
+    """
+    phrases = [word.strip().replace('"', '""') for word in keywords if word.strip()]
+    return " OR ".join(f'"{phrase}"' for phrase in phrases)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Query the local index of harvested arXiv submissions. Usage:\n\n"
+              "\tpython index.py <index file> <query> [listing] [max results]\n\n"
+              "The query uses the FTS5 syntax, e.g. '\"integrated photonics\" AND (chip OR waveguide) NOT review'.\n"
+              "Comma separated keywords without any operators are searched as 'any of these'.")
+        exit(1)
+
+    query = sys.argv[2]
+    if "," in query and '"' not in query:
+        query = keywords_query(query.split(","))
+    index = SubmissionIndex(sys.argv[1])
+    try:
+        hits = index.search(query, listing=sys.argv[3] if len(sys.argv) > 3 else None, limit=int(sys.argv[4]) if len(sys.argv) > 4 else 50)
+    except sqlite3.OperationalError as error:
+        print(f"Invalid query '{query}': {error}"); exit(1)
+    for hit in hits:
+        print(f"{hit.score:6.2f}  {hit.date}  {hit.listing}  https://arxiv.org/{hit.link}\n\t{hit.title}\n")
+    print(f"{len(hits)} results.")
@@ -0,0 +1,103 @@
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, NamedTuple
+
+class Submission(NamedTuple):
+    section: str
+    link: str
+    title: str
+    abstract: str
+    subjects: tuple[str, ...] = ()
+    # matched keywords per keyword set if the page was already matched while parsing (see `backends.parse_page`)
+    matches: tuple[tuple[str, ...], ...] = ()
+
+    @property
+    def id(self) -> str:
+        return self.link.rstrip("/").rsplit("/", 1)[-1]
+
+# headings of the three parts of a catchup listing and their section keys
+sections = {"New submissions (": "New", "Cross submissions (": "Cross", "Replacement submissions (": "Replace"}
+# <div> classes of the parts of an item that are collected
+fields = {"list-title mathjax": "title", "list-subjects": "subjects"}
+subject_pattern = re.compile(r"\(([a-z-]+(?:\.[A-Za-z-]+)?)\)")
+
+class ListingParser(HTMLParser):
+    """Single pass parser for arXiv listing pages. One item consists of a <dt> containing the href and a <dd> containing the
+    title, subjects and abstract. Finished items are collected as `Submission` records and can be taken out with `pop`.
+    """
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.section = "New"
+        self.items = list()
+        self._reset_item()
+
+    def _reset_item(self) -> None:
+        self._in_item = False
+        self._link = None
+        self._texts = {"title": list(), "subjects": list()}
+        self._abstract = list()
+        self._field = None
+        self._depth = 0
+        self._in_abstract = False
+        self._had_abstract = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "dt":
+            self._reset_item()
+            self._in_item = True
+        elif not self._in_item:
+            return
+        elif tag == "a" and self._link is None:
+            href = dict(attrs).get("href")
+            if href is not None:
+                self._link = href
+        elif tag == "div":
+            if self._depth:
+                self._depth += 1
+            elif dict(attrs).get("class") in fields:
+                self._field = fields[dict(attrs).get("class")]
+                self._depth = 1
+        elif tag == "p" and not self._had_abstract:
+            self._in_abstract = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._in_item:
+            return
+        if tag == "div" and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._field = None
+        elif tag == "p" and self._in_abstract:
+            self._in_abstract = False
+            self._had_abstract = True
+        elif tag == "dd":
+            if self._link is not None:
+                title = " ".join("".join(self._texts["title"]).split()).replace("Title:", "", 1).strip()
+                abstract = " ".join("".join(self._abstract).split())
+                subjects = tuple(subject_pattern.findall("".join(self._texts["subjects"])))
+                self.items.append(Submission(self.section, self._link, title, abstract, subjects))
+            self._reset_item()
+
+    def handle_data(self, data: str) -> None:
+        if self._field is not None:
+            self._texts[self._field].append(data)
+        elif self._in_abstract:
+            self._abstract.append(data)
+        elif not self._in_item:
+            for heading, key in sections.items():
+                if heading in data:
+                    self.section = key
+
+    def pop(self) -> list[Submission]:
+        items, self.items = self.items, list()
+        return items
+
+def parse_listing(page: str | Iterable[str]) -> Iterator[Submission]:
+    """Yields all submissions of a listing page. The page can also be given as an iterable of chunks (e.g. a streamed response).
+    """
+    parser = ListingParser()
+    for chunk in ([page] if isinstance(page, str) else page):
+        parser.feed(chunk)
+        yield from parser.pop()
+    parser.close()
+    yield from parser.pop()
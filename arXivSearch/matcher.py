@@ -0,0 +1,33 @@
+import re
+
+class KeywordMatcher:
+    """Matches all keywords at once with one precompiled alternation. A keyword matches case insensitive on word boundaries,
+    optionally with a leading or trailing hyphen (same as searching `\\b-?keyword-?\\b` for every keyword on its own).
+    """
+    def __init__(self, keywords: list[str]) -> None:
+        self.keywords = list(keywords)
+        self._by_text = dict()
+        for word in self.keywords:
+            self._by_text.setdefault(word.lower(), list()).append(word)
+
+        # the lookahead makes the scan try every position, so keywords inside of longer keywords are found as well.
+        # longer keywords come first and the shorter ones sharing the same start are checked with their own patterns
+        alternation = "|".join(re.escape(word) for word in sorted(self._by_text, key=len, reverse=True))
+        self._pattern = re.compile(rf"\b(?=-?({alternation})-?\b)", flags=re.IGNORECASE)
+        self._single = {text: re.compile(rf"\b-?{re.escape(text)}-?\b", flags=re.IGNORECASE) for text in self._by_text}
+        self._prefixes = {text: [other for other in self._by_text if other != text and text.startswith(other)] for text in self._by_text}
+
+    def match(self, *texts: str) -> list[str]:
+        """Returns all keywords found in any of the texts in the order of the keywords.
+        """
+        text = "\n".join(texts)
+        found = set()
+        for match in self._pattern.finditer(text):
+            hit = match.group(1).lower()
+            found.add(hit)
+            for prefix in self._prefixes.get(hit, ()):
+                if prefix not in found and self._single[prefix].match(text, match.start()):
+                    found.add(prefix)
+            if len(found) == len(self._by_text):
+                break
+        return [word for word in self.keywords if word.lower() in found]
@@ -0,0 +1,83 @@
+import re
+from itertools import chain
+
+import numpy as np
+
+token_pattern = re.compile(r"[a-z0-9]+")
+
+class RelevanceEngine:
+    """Fuzzy relevance of submissions for keywords: TF-IDF vectors of words and character n-grams (so 'photonics' is close
+    to 'photonic') compared by cosine similarity. Keywords of several words are also searched as their acronym (e.g. 'PIC'
+    for 'photonic integrated circuit').
+
+    The texts of one day are scored as a batch: after splitting them into words everything is done with NumPy on flat
+    (document, feature) arrays and the inverse document frequencies are the ones of the batch.
+    """
+    def __init__(self, ngrams: tuple[int, int] = (3, 5)) -> None:
+        self.ngrams = range(ngrams[0], ngrams[1] + 1)
+        self._features = dict()
+        self._words = dict()
+        self._word_features = list()
+
+    def _word(self, word: str) -> int:
+        """Returns the id of a word and stores its features (the word itself and its n-grams) the first time it is seen.
+        """
+        key = self._words.get(word)
+        if key is None:
+            padded = f"<{word}>"
+            grams = [f"w:{word}"] + [padded[i:i + n] for n in self.ngrams for i in range(len(padded) - n + 1)]
+            key = self._words[word] = len(self._word_features)
+            self._word_features.append([self._features.setdefault(gram, len(self._features)) for gram in grams])
+        return key
+
+    def _counts(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the rows (text), columns (feature) and counts of all features occurring in the texts.
+        """
+        words = [np.fromiter((self._word(word) for word in token_pattern.findall(text.lower())), dtype=np.int64) for text in texts]
+        lengths = np.array([len(ids) for ids in words], dtype=np.int64)
+        if not lengths.sum():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        docs = np.repeat(np.arange(len(texts)), lengths)
+        used, inverse = np.unique(np.concatenate(words), return_inverse=True)
+
+        # expand every (text, word) pair to the (text, feature) pairs of the word
+        sizes = np.array([len(self._word_features[key]) for key in used], dtype=np.int64)
+        flat = np.fromiter(chain.from_iterable(self._word_features[key] for key in used), dtype=np.int64)
+        starts = np.cumsum(sizes) - sizes
+        per = sizes[inverse]
+        offsets = np.repeat(starts[inverse], per) + np.arange(per.sum()) - np.repeat(np.cumsum(per) - per, per)
+        total = len(self._features)
+        pairs, counts = np.unique(np.repeat(docs, per) * total + flat[offsets], return_counts=True)
+        return pairs // total, pairs % total, counts
+
+    def score(self, texts: list[str], keyword_sets: list[list[str]]) -> list[np.ndarray]:
+        """Returns one (texts x keywords) array of cosine similarities per keyword set.
+        """
+        rows, cols, counts = self._counts(texts)
+        variants = [(i, j, text) for i, keywords in enumerate(keyword_sets) for j, word in enumerate(keywords) for text in self._variants(word)]
+        queries = [self._counts([text]) for _, _, text in variants]
+        total = len(self._features)
+
+        # sublinear term frequencies, inverse document frequencies of the batch
+        df = np.bincount(cols, minlength=total)
+        idf = np.log((1 + len(texts)) / (1 + df)) + 1
+        weights = (1 + np.log(counts)) * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(texts)))
+        norms[norms == 0] = 1
+
+        scores = [np.zeros((len(texts), len(keywords))) for keywords in keyword_sets]
+        for (i, j, _), (_, query_cols, query_counts) in zip(variants, queries):
+            query = np.zeros(total)
+            query[query_cols] = (1 + np.log(query_counts)) * idf[query_cols]
+            length = np.sqrt((query ** 2).sum())
+            if length:
+                similarity = np.bincount(rows, weights=weights * query[cols], minlength=len(texts)) / (norms * length)
+                np.maximum(scores[i][:, j], similarity, out=scores[i][:, j])
+        return scores
+
+    @staticmethod
+    def _variants(keyword: str) -> list[str]:
+        """A keyword is searched as is and, if it consists of several words, as its acronym.
+        """
+        words = token_pattern.findall(keyword.lower())
+        return [keyword, "".join(word[0] for word in words)] if len(words) > 1 else [keyword]
@@ -1,9 +1,27 @@
-import requests
-from bs4 import BeautifulSoup
 import sys
+import json
 from datetime import datetime, timedelta
 import re
 from pathlib import Path
+from importlib.util import find_spec
+if __package__:
+    from .fetcher import Fetcher, FetchError
+    from .cache import PageCache
+    from .listing import Submission
+    from .matcher import KeywordMatcher
+    from .index import SubmissionIndex
+    from .state import CrawlState
+    from .sinks import Result, MemorySink, open_sinks, sinks
+    from .backends import CatchupBackend, OAIBackend
+else:
+    from fetcher import Fetcher, FetchError
+    from cache import PageCache
+    from listing import Submission
+    from matcher import KeywordMatcher
+    from index import SubmissionIndex
+    from state import CrawlState
+    from sinks import Result, MemorySink, open_sinks, sinks
+    from backends import CatchupBackend, OAIBackend
 
 def format_text(s: str, bold: bool = False, underline: bool = False) -> str:
     """Helper function to print formatted (bold, underline) text in the console.
@@ -15,37 +33,90 @@ def format_text(s: str, bold: bool = False, underline: bool = False) -> str:
         e += "\033[4m"
     return f"{e}{s}\033[0m"
 
-def parse_item(item: str) -> tuple:
-    """Helper function to parse an item from a arXiv html webpage. Checks the title and abstract for the keywords.
+def load_profiles(filepath: str) -> list[dict]:
+    """Helper function to read a batch file: a json list of profiles, each with a 'name', 'keywords' (seperated by commas
+    or as a list) and an output 'file' (.txt is appended automatically).
     """
-    soup = BeautifulSoup(item, "html.parser")
-    link = soup.find("dt").find("a", href=True)["href"]
-    title = soup.find("dd").find("div", class_="list-title mathjax").get_text(strip=True).replace("Title:", "")
-    abstract = soup.find("p").get_text(strip=True)
-    matched_words = list()
-    for word in keywords.split(","):
-        pattern = r"(\b[-]?" + re.escape(word) + r"[-]?\b)"
-        if any([re.search(pattern, part, flags=re.IGNORECASE) for part in [title, abstract]]):
-            matched_words.append(word)
+    with open(filepath, encoding="utf-8") as file:
+        entries = json.load(file)
+    profiles = list()
+    for entry in entries:
+        words = entry["keywords"].split(",") if isinstance(entry["keywords"], str) else list(entry["keywords"])
+        profiles.append({"name": entry.get("name", entry["file"]), "keywords": words, "outfile": f"{entry['file']}.txt"})
+    return profiles
+
+def resolve_listings(archives: list[str], categories: list[str]) -> list[tuple[str, str, str]]:
+    """Helper function to turn the given archives and categories (names or codes like 'physics.optics') into the listings
+    (archive, category, path) to search. Archives without any of the given categories are searched as a whole.
+    """
+    names = {code: name for name, code in archive_map.items()}
+    selected = dict()
+    for archive in archives:
+        if archive in names:
+            archive = names[archive]
+        if archive not in archive_map:
+            raise ValueError(f"Archive '{archive}' is not a valid arXiv archive!")
+        selected.setdefault(archive, list())
+
+    for category in categories:
+        code, _, sub = category.partition(".")
+        if sub and code in names and f".{sub}" in category_map.get(code, dict()).values():
+            archive = names[code]
+            name = next(name for name, value in category_map[code].items() if value == f".{sub}")
+        else:
+            archive = next((archive for archive in selected if category in category_map.get(archive_map[archive], dict())), None)
+            if archive is None:
+                if category in selected:
+                    continue
+                raise ValueError(f"Category '{category}' is not a valid arXiv category for the archives {list(selected)}!")
+            name = category
+        if name not in selected.setdefault(archive, list()):
+            selected[archive].append(name)
+
+    listings = list()
+    for archive, chosen in selected.items():
+        code = archive_map[archive]
+        if not chosen:
+            listings.append((archive, "", code))
+        for name in chosen:
+            listings.append((archive, name, f"{code}{category_map[code][name]}"))
+    return listings
+
+def match_item(item: Submission, matcher: KeywordMatcher, words: tuple[str, ...] | None = None) -> Result:
+    """Helper function to check the title and abstract of a parsed submission for the keywords (unless the matched `words`
+    are already known).
+    """
+    matched_words = matcher.match(item.title, item.abstract) if words is None else list(words)
     if matched_words:
-        return f"https://arxiv.org/{link}", title, abstract, matched_words
+        return Result(f"https://arxiv.org/{item.link}", item.title, item.abstract, matched_words, list(item.subjects))
 
-# print usage if no cmd line argument is provided
-if len(sys.argv) < 2:
-    print(f"Save all relevant arXiv papers from a given date upto the current date in a txt file. Usage:\n\n"
-          f"\t{format_text('-a', bold=True)} {format_text('archive', underline=True)}\n"
-          f"\t\tThe archive to search in. Defaults to 'Quantum Physics'\n"
-          f"\t{format_text('-c', bold=True)} {format_text('category', underline=True)}\n"
-          f"\t\tThe category to search in. Can be omitted when the given archive only has one category. Defaults to 'Quantum Physics'\n"
-          f"\t{format_text('-d', bold=True)} {format_text('date', underline=True)}\n"
-          f"\t\tFrom date in the form: dd.mm.yyyy. Defaults to last monday 1 week ago (i.e. search last 2 weeks).\n"
-          f"\t{format_text('-k', bold=True)} {format_text('keywords', underline=True)}\n"
-          f"\t\tSearch-keywords seperated by commas. Defaults to: integrated,chip,photonic.\n"
-          f"\t{format_text('-f', bold=True)} {format_text('file', underline=True)}\n"
-          f"\t\tName of the output file (.txt is appended automatically). Defaults to 'Search Output'.\n"
-          f"\t{format_text('-s', bold=True)} {format_text('save', underline=True)}\n"
-          f"\t\tSave old search result files if the given file path would overwrite them. Defaults to True.\n")
-    exit(1)
+def score_item(item: Submission, match: Result | None, keywords: list[str], scores: list[float], threshold: float) -> Result | None:
+    """Helper function to add the keywords with a relevance score above the threshold to the exact matches of a submission.
+    """
+    found = match.keywords if match else []
+    words = [word for word, score in zip(keywords, scores) if score >= threshold or word in found]
+    if words:
+        return Result(f"https://arxiv.org/{item.link}", item.title, item.abstract, words, list(item.subjects), round(float(max(scores)), 3))
+
+def save_old_results(outfile: str) -> None:
+    """Helper function to move an old search result file out of the way. The new name contains the dates and keywords of the old search.
+    """
+    file_path = Path(outfile)
+    if file_path.exists():
+        with open(outfile) as file:
+            line = file.readline()
+        if line:
+            pattern = r"\b(0[1-9]|[12][0-9]|3[01])\.(0[1-9]|1[0-2])\.(\d{4})\b"
+            matches = re.findall(pattern, line)
+            from_date = "".join(reversed(matches[0]))
+            to_date = "".join(reversed(matches[1]))
+            keys = [word.strip().strip("'") for word in re.findall(r"\[(.*?)\]", line)[0].split(",")]
+            new_path = f"{from_date}_{to_date}_{"-".join(keys)}.txt"
+            file_path.replace(new_path)
+            print(f"Found old search result file '{outfile}' and moved it to '{new_path}'.")
+        else:
+            print(f"Found old search result file '{outfile}' but could not read first line. Maybe the file is empty? Either remove the file or set -save 'False'.")
+            exit(1)
 
 # mapping for archives and categories
 archive_map = {
@@ -242,156 +313,399 @@ category_map = {
     },
 }
 
-# set defaults
-archive = "Quantum Physics"
-category = ""
-today = datetime.today()
-argv = sys.argv[1:]
-date = today - timedelta(today.weekday() + 7)
-keywords = "integrated,chip,photonic"
-outfile = "Search Output.txt"
-save = True
 
-# process cmd line arguments
-try:
-    i = 0
-    while i < len(argv):
-        arg = argv[i]
-        if arg in ["-date", "-d"]:
-            try:
-                date = datetime.strptime(argv[i+1], "%d.%m.%Y")
-            except ValueError:
-                print("Please provide date in the following format: dd.mm.yyyy!")
-                exit(1)
-            i += 1
-        elif arg in ["-archive", "-a"]:
-            archive = argv[i+1]
-            i += 1
-        elif arg in ["-category", "-c"]:
-            category = argv[i+1]
-            i += 1
-        elif arg in ["-keywords", "-k"]:
-            keywords = argv[i+1]
-            i += 1
-        elif arg in ["-file", "-f"]:
-            outfile = f"{argv[i+1]}.txt"
-            i += 1
-        elif arg in ["-save", "-s"]:
-            if argv[i+1] == "True":
-                save = True
-            elif argv[i+1] == "False":
-                save = False
-            else:
-                print(f"Wrong value provided for {arg}! Use either 'True' or 'False'.")
-                exit(1)
-            i += 1
-        elif arg in ["-run", "-r"]:
-            if len(argv) > 1:
-                print("Cannot use -r option in combination with other options!")
-                exit(1)
-            i += 1
-        else:
-            print(f"Unknown option: {arg}!"); exit(1)
-        i += 1
-except IndexError:
-    print(f"Please provide a value for {argv[i]}!"); exit(1)
-# check for valid inputs
-if archive not in archive_map:
-    print(f"Archive '{archive}' is not a valid arXiv archive!"); exit(1)
-if category and category != archive and category not in category_map[archive_map[archive]]:
-    print(f"Category '{category}' is not a valid arXiv category for the archive '{archive}'!"); exit(1)
+def start_day(listings: list[tuple[str, str, str]], since: datetime, state: CrawlState | None) -> datetime:
+    """Helper function to find the first day to search. With a state every listing continues after its last finished day.
+    """
+    if state is None:
+        return since
+    starts = [state.last_day(path) + timedelta(days=1) if state.last_day(path) else since.date() for _, _, path in listings]
+    return datetime.combine(min(starts), datetime.min.time())
 
-# print search parameters
-current = date
-results = dict()
-print(f"Running search with:\n\t"
-      f"{format_text('archive', underline=True)}: {archive}\n\t" +
-      (f"{format_text('category', underline=True)}: {category}\n\t" if category else "") +
-      f"{format_text('date', underline=True)}: {date.strftime("%d.%m.%Y")}\n\t"
-      f"{format_text('keywords', underline=True)}: {keywords.split(",")}\n\t"
-      f"{format_text('outfile', underline=True)}: '{outfile}'\n\t"
-      f"{format_text('save', underline=True)}: {save}")
+def search(archive: str | list[str] = "Quantum Physics", categories: str | list[str] | None = None, since: datetime | None = None,
+           keywords: str | list[str] = "integrated,chip,photonic", sink=None, *, until: datetime | None = None, profiles: list[dict] | None = None,
+           workers: int = 4, pause: float = 0.5, cache: str | None = "arXiv Cache.sqlite", index: str | None = None,
+           state: str | CrawlState | None = None, metadata: str | None = None, fetcher: Fetcher | None = None, relevance: float | None = None,
+           processes: int = 0, verbose: bool = False) -> list[dict] | None:
+    """Searches the submissions of the given archives and categories (names or codes like 'physics.optics', several as a list)
+    from `since` (defaults to last monday 1 week ago) up to `until` (defaults to today) for the keywords (seperated by commas
+    or as a list). The results are written day by day to the sink (or a list of sinks) which is closed at the end. Without a
+    sink the results are returned as a list of flat records (see `RecordSink.records`).
 
-# main loop going through the webpage for each day and parsing all items (submissions)
-print("Checking:")
-while current <= today:
-    path = archive_map[archive]
-    path = f"{path}{category_map[path][category]}" if category else path
-    url = f"https://arxiv.org/catchup/{path}/{current.year}-{current.month:02}-{current.day:02}?abs=True"
-    response = requests.get(url)
-    page = BeautifulSoup(response.text, "html.parser").prettify()
-    
-    item = ""
-    subs = 0
-    grab = False
-    date_key = current.strftime("%d.%m.%Y")
-    results[date_key] = {"New": list(), "Cross": list(), "Replace": list()}
-    
-    for line in page.splitlines():
-        # split submissions into new, cross and replacements
-        if "New submissions (" in line:
-            key = "New"
-        elif "Cross submissions (" in line:
-            key = "Cross"
-        elif "Replacement submissions (" in line:
-            key = "Replace"
-        
-        # one item consists of a <dt> containing the href and a <dd> containing the title and abstract
-        if "<dt>" in line:
-            grab = True
-        elif "</dd>" in line:
-            grab = False
-            parse = parse_item(item)
-            if parse:
-                subs += 1
-                results[date_key][key].append(parse)
-            item = ""
-        if grab:
-            item += line
-        else:
-            continue
-    print(f"\t{current.strftime("%A"):<10} {date_key}: found {subs} submissions.")
-    
-    current += timedelta(days=1)
+    Several keyword sets are searched with one crawl by giving `profiles` (dicts with 'keywords', 'sinks' and optionally a
+    'name' and a 'key' for the state) instead of keywords and sink. `cache`, `index`, `state` and `metadata` work like the
+    command line options, a fetcher can be passed to reuse its session. Raises a ValueError for unknown archives or categories
+    and a FetchError if a page could not be downloaded. The sinks, files and connections are closed on errors as well and the
+    state keeps the days that were written before the error.
 
-current -= timedelta(days=1)
-sub_mapping = {"New": "New submissions", "Cross": "Cross submissions", "Replace": "Replacement submissions"}
+    With a `relevance` threshold (cosine similarity between 0 and 1, see `RelevanceEngine`) papers that are similar to a
+    keyword are reported as well and the results of every day are ranked by their relevance (needs numpy). With more than
+    one of `processes` the catchup pages are parsed and matched in a process pool.
+    """
+    today = datetime.today()
+    archives = [archive] if isinstance(archive, str) else list(archive)
+    categories = [categories] if isinstance(categories, str) else list(categories or [])
+    listings = resolve_listings(archives, categories)
+    if isinstance(state, str):
+        state = CrawlState(state)
+    date = start_day(listings, since if since is not None else today - timedelta(today.weekday() + 7), state)
+    until = min(until or today, today)
 
-# save old search outputs
-if save:
-    file_path = Path(outfile)
-    if file_path.exists():
-        with open(outfile) as file:
-            line = file.readline()
-        if line:
-            pattern = r"\b(0[1-9]|[12][0-9]|3[01])\.(0[1-9]|1[0-2])\.(\d{4})\b"
-            matches = re.findall(pattern, line)
-            from_date = "".join(reversed(matches[0]))
-            to_date = "".join(reversed(matches[1]))
-            keys = [word.strip().strip("'") for word in re.findall(r"\[(.*?)\]", line)[0].split(",")]
-            new_path = f"{from_date}_{to_date}_{"-".join(keys)}.txt"
-            file_path.replace(new_path)
-            print(f"Found old search result file '{outfile}' and moved it to '{new_path}'.")
+    collected = None
+    if profiles is None:
+        if sink is None:
+            sink = collected = MemorySink()
+        profiles = [{"keywords": keywords.split(",") if isinstance(keywords, str) else list(keywords), "sinks": sink if isinstance(sink, list) else [sink]}]
+    matchers = [KeywordMatcher(profile["keywords"]) for profile in profiles]
+    keys = [profile.get("key") or profile.get("name") or ",".join(profile["keywords"]) for profile in profiles]
+    engine = None
+    if relevance is not None:
+        if __package__:
+            from .relevance import RelevanceEngine
         else:
-            print("Found old search result file but could not read first line. Maybe the file is empty? Either remove the file or set -save 'False'.")
-            exit(1)
+            from relevance import RelevanceEngine
+        engine = RelevanceEngine()
 
-# write search results to a file
-with open(outfile, "w", encoding="utf-8") as file:
-    insert = f"'{archive}'"
-    insert = f"{insert} - '{category}'" if category else f"{insert} - {insert}"
-    file.write(f"ArXiv search for {insert} from {date.strftime("%A")}, {date.strftime("%d.%m.%Y")} - {current.strftime("%A")}, {current.strftime("%d.%m.%Y")} "
-               f"with keywords: {keywords.split(",")}\n\n")
-    for date, result in results.items():
-        day = datetime.strptime(date, "%d.%m.%Y")
-        if any([result[k] for k in sub_mapping]):
-            file.write(f"{day.strftime("%A")}, {day.strftime("%d.%m.%Y")}:\n\n")
-            for sub, items in result.items():
-                if items:
-                    file.write(f"\t{sub_mapping[sub]}:\n\n")
-                    for item in items:
-                        file.write(f"\t\t{item[0]}, keywords: {item[3]}\n\t\t{item[1]}\n\t\t\tAbstract: {item[2]}\n\n")
+    # main loop getting the submissions of all listings and days from the backend (the catchup pages are fetched concurrently)
+    # and processing all items (submissions) in date order
+    if verbose:
+        print("Checking:")
+    dates = [date + timedelta(days=n) for n in range((until.date() - date.date()).days + 1)]
+    pairs = [(day, path) for day in dates for _, _, path in listings
+             if state is None or state.last_day(path) is None or day.date() > state.last_day(path)]
+    page_cache = submission_index = fetched = None
+    own_fetcher = fetcher is None
+    begun = list()
+    # everything opened here is closed again if the search fails (e.g. a FetchError). The state is saved in any case: it
+    # only contains the days that were completely written to the sinks, so the next run continues after them
+    try:
+        page_cache = PageCache(cache) if cache and own_fetcher else None
+        submission_index = SubmissionIndex(index) if index else None
+        if own_fetcher:
+            fetcher = Fetcher(workers=workers, interval=pause, cache=page_cache)
+        if metadata:
+            backend = OAIBackend(today, metadata, fetcher=fetcher, index=submission_index)
         else:
-            file.write(f"{day.strftime("%A")}, {day.strftime("%d.%m.%Y")}: No submissions found.\n\n")
+            backend = CatchupBackend(today, fetcher, index=submission_index, processes=processes, keyword_sets=[profile["keywords"] for profile in profiles])
+        fetched = backend.fetch(pairs)
+        wanted = set(pairs)
+        rank = {"New": 0, "Cross": 1, "Replace": 2}
+
+        last = dates[-1] if dates else date - timedelta(days=1)
+        for profile in profiles:
+            for output in profile["sinks"]:
+                output.begin(listings, date, last)
+                begun.append(output)
+
+        for current in dates:
+            subs = 0
+            results = [{"New": list(), "Cross": list(), "Replace": list()} for _ in profiles]
+            # changes of the state are only applied once the day was written
+            done, reported = list(), list()
+
+            # submissions are split into new, cross and replacements by the parser. papers cross-listed in several of the
+            # searched listings are only kept once (in their most relevant section) with the subjects of all listings
+            unique = dict()
+            for _, _, path in listings:
+                if (current, path) not in wanted:
+                    continue
+                items, final = next(fetched)
+                if final:
+                    done.append(path)
+                for item in items:
+                    item = item if item.subjects else item._replace(subjects=(path,))
+                    previous = unique.get(item.id)
+                    if previous is not None:
+                        best = item if rank[item.section] < rank[previous.section] else previous
+                        item = best._replace(subjects=tuple(dict.fromkeys(previous.subjects + item.subjects)))
+                    unique[item.id] = item
+
+            # every item is checked against the keywords of all profiles, the relevance of the whole day is scored at once
+            items = list(unique.values())
+            if engine is not None:
+                scores = engine.score([f"{item.title} {item.abstract}" for item in items], [profile["keywords"] for profile in profiles])
+            for n, item in enumerate(items):
+                found = False
+                for p, (matcher, key, result) in enumerate(zip(matchers, keys, results)):
+                    if state is not None and state.is_reported(key, item.id):
+                        continue
+                    match = match_item(item, matcher, item.matches[p] if item.matches else None)
+                    if engine is not None:
+                        match = score_item(item, match, profiles[p]["keywords"], scores[p][n], relevance)
+                    if match:
+                        found = True
+                        result[item.section].append(match)
+                        reported.append((key, item.id))
+                subs += found
+            if engine is not None:
+                for result in results:
+                    for section in result.values():
+                        section.sort(key=lambda match: match.score, reverse=True)
+            for profile, result in zip(profiles, results):
+                for output in profile["sinks"]:
+                    output.write_day(current, result)
+            if state is not None:
+                for path in done:
+                    state.mark_done(path, current.date())
+                for key, arxiv_id in reported:
+                    state.mark_reported(key, arxiv_id)
+            if verbose:
+                print(f"\t{current.strftime("%A"):<10} {current.strftime("%d.%m.%Y")}: found {subs} submissions.")
+        if verbose and fetcher.stats.requests:
+            print(f"Downloads: {fetcher.stats}.")
+    finally:
+        # stops the downloads (and parsing processes) of a failed search
+        if fetched is not None:
+            fetched.close()
+        for output in begun:
+            output.close()
+        if own_fetcher and fetcher is not None:
+            fetcher.close()
+        if page_cache is not None:
+            page_cache.close()
+        if submission_index is not None:
+            submission_index.close()
+        if state is not None:
+            state.save()
+    if collected is not None:
+        return collected.results
+
+def main(argv: list[str]) -> None:
+    """Command line interface, see the usage below.
+    """
+    # print usage if no cmd line argument is provided
+    if not argv:
+        print(f"Save all relevant arXiv papers from a given date upto the current date in a txt file. Usage:\n\n"
+              f"\t{format_text('-a', bold=True)} {format_text('archive', underline=True)}\n"
+              f"\t\tThe archive to search in (several archives seperated by ';'). Defaults to 'Quantum Physics'\n"
+              f"\t{format_text('-c', bold=True)} {format_text('category', underline=True)}\n"
+              f"\t\tThe category to search in (several categories seperated by ';', also as codes like 'physics.optics'). Can be omitted\n"
+              f"\t\twhen the whole archive should be searched. Papers cross-listed in several categories are only reported once.\n"
+              f"\t{format_text('-d', bold=True)} {format_text('date', underline=True)}\n"
+              f"\t\tFrom date in the form: dd.mm.yyyy. Defaults to last monday 1 week ago (i.e. search last 2 weeks).\n"
+              f"\t{format_text('-t', bold=True)} {format_text('to', underline=True)}\n"
+              f"\t\tLast date to search in the form: dd.mm.yyyy. Defaults to today.\n"
+              f"\t{format_text('-k', bold=True)} {format_text('keywords', underline=True)}\n"
+              f"\t\tSearch-keywords seperated by commas. Defaults to: integrated,chip,photonic.\n"
+              f"\t{format_text('-f', bold=True)} {format_text('file', underline=True)}\n"
+              f"\t\tName of the output file (the extension is appended automatically). Defaults to 'Search Output'.\n"
+              f"\t{format_text('-o', bold=True)} {format_text('output', underline=True)}\n"
+              f"\t\tOutput formats seperated by commas: txt, jsonl, csv and parquet (needs pyarrow). Defaults to txt.\n"
+              f"\t{format_text('-s', bold=True)} {format_text('save', underline=True)}\n"
+              f"\t\tSave old search result files (.txt) if the given file path would overwrite them. Defaults to True.\n"
+              f"\t{format_text('-w', bold=True)} {format_text('workers', underline=True)}\n"
+              f"\t\tNumber of days that are fetched concurrently. Defaults to 4.\n"
+              f"\t{format_text('-n', bold=True)} {format_text('processes', underline=True)}\n"
+              f"\t\tNumber of processes that parse the downloaded pages and check them for the keywords (uses several CPU cores for\n"
+              f"\t\tlong searches). Defaults to 0, i.e. everything runs in the main process.\n"
+              f"\t{format_text('-p', bold=True)} {format_text('pause', underline=True)}\n"
+              f"\t\tMinimum pause in seconds between the start of two requests (be polite to arXiv). Defaults to 0.5.\n"
+              f"\t{format_text('-x', bold=True)} {format_text('cache', underline=True)}\n"
+              f"\t\tFile of the page cache (past days are only downloaded once). Use 'None' to disable caching. Defaults to 'arXiv Cache.sqlite'.\n"
+              f"\t{format_text('-i', bold=True)} {format_text('index', underline=True)}\n"
+              f"\t\tFile of a local full text index all parsed submissions are added to (query it with index.py). Days already in\n"
+              f"\t\tthe index are read from it instead of being downloaded and parsed again. Defaults to no index.\n"
+              f"\t{format_text('-b', bold=True)} {format_text('batch', underline=True)}\n"
+              f"\t\tJson file with a list of search profiles ({{\"name\": ..., \"keywords\": ..., \"file\": ...}}). All profiles are\n"
+              f"\t\tsearched with one crawl and each gets its own output file. Replaces -k and -f.\n"
+              f"\t{format_text('-u', bold=True)} {format_text('update', underline=True)}\n"
+              f"\t\tState file for incremental runs: only days after the last finished day of the previous run are searched (-d is\n"
+              f"\t\tonly used for listings that were never searched) and only papers that were not reported before are written.\n"
+              f"\t{format_text('-m', bold=True)} {format_text('metadata', underline=True)}\n"
+              f"\t\tRead the bulk metadata of arXiv instead of the daily catchup pages (much faster for long date ranges): 'oai' for\n"
+              f"\t\tthe OAI-PMH interface of arXiv or the path of a local OAI-PMH xml file (can be gzipped). Papers only appear there after\n"
+              f"\t\tthey were announced, so with -u the days of the last week are searched again by the next run. Defaults to the catchup pages.\n"
+              f"\t{format_text('-e', bold=True)} {format_text('relevance', underline=True)}\n"
+              f"\t\tAlso report papers similar to the keywords (TF-IDF of words and word parts, keywords of several words are also\n"
+              f"\t\tsearched as acronyms) with a relevance of at least the given threshold between 0 and 1 (e.g. 0.3) and rank the\n"
+              f"\t\tresults of every day by relevance (needs numpy). Defaults to exact keyword matches only.\n")
+        exit(1)
+
+    # set defaults
+    archives = ["Quantum Physics"]
+    categories = list()
+    today = datetime.today()
+    date = today - timedelta(today.weekday() + 7)
+    until = today
+    keywords = "integrated,chip,photonic"
+    outfile = "Search Output.txt"
+    save = True
+    formats = ["txt"]
+    workers = 4
+    pause = 0.5
+    cachefile = "arXiv Cache.sqlite"
+    indexfile = None
+    batchfile = None
+    statefile = None
+    metadata = None
+    relevance = None
+    processes = 0
+
+    # process cmd line arguments
+    try:
+        i = 0
+        while i < len(argv):
+            arg = argv[i]
+            if arg in ["-date", "-d"]:
+                try:
+                    date = datetime.strptime(argv[i+1], "%d.%m.%Y")
+                except ValueError:
+                    print("Please provide date in the following format: dd.mm.yyyy!")
+                    exit(1)
+                i += 1
+            elif arg in ["-to", "-t"]:
+                try:
+                    until = datetime.strptime(argv[i+1], "%d.%m.%Y")
+                except ValueError:
+                    print("Please provide date in the following format: dd.mm.yyyy!")
+                    exit(1)
+                i += 1
+            elif arg in ["-archive", "-a"]:
+                archives = argv[i+1].split(";")
+                i += 1
+            elif arg in ["-category", "-c"]:
+                categories = argv[i+1].split(";")
+                i += 1
+            elif arg in ["-keywords", "-k"]:
+                keywords = argv[i+1]
+                i += 1
+            elif arg in ["-file", "-f"]:
+                outfile = f"{argv[i+1]}.txt"
+                i += 1
+            elif arg in ["-output", "-o"]:
+                formats = argv[i+1].split(",")
+                for output in formats:
+                    if output not in sinks:
+                        print(f"Unknown output format '{output}'! Use any of {list(sinks)}.")
+                        exit(1)
+                if "parquet" in formats and find_spec("pyarrow") is None:
+                    print("The parquet output needs pyarrow: pip install pyarrow")
+                    exit(1)
+                i += 1
+            elif arg in ["-save", "-s"]:
+                if argv[i+1] == "True":
+                    save = True
+                elif argv[i+1] == "False":
+                    save = False
+                else:
+                    print(f"Wrong value provided for {arg}! Use either 'True' or 'False'.")
+                    exit(1)
+                i += 1
+            elif arg in ["-workers", "-w"]:
+                try:
+                    workers = int(argv[i+1])
+                except ValueError:
+                    print(f"Please provide an integer for {arg}!")
+                    exit(1)
+                i += 1
+            elif arg in ["-pause", "-p"]:
+                try:
+                    pause = float(argv[i+1])
+                except ValueError:
+                    print(f"Please provide a number (seconds) for {arg}!")
+                    exit(1)
+                i += 1
+            elif arg in ["-cache", "-x"]:
+                cachefile = None if argv[i+1] == "None" else argv[i+1]
+                i += 1
+            elif arg in ["-index", "-i"]:
+                indexfile = argv[i+1]
+                i += 1
+            elif arg in ["-batch", "-b"]:
+                batchfile = argv[i+1]
+                i += 1
+            elif arg in ["-update", "-u"]:
+                statefile = argv[i+1]
+                i += 1
+            elif arg in ["-metadata", "-m"]:
+                metadata = argv[i+1]
+                i += 1
+            elif arg in ["-processes", "-n"]:
+                try:
+                    processes = int(argv[i+1])
+                except ValueError:
+                    print(f"Please provide an integer for {arg}!")
+                    exit(1)
+                i += 1
+            elif arg in ["-relevance", "-e"]:
+                try:
+                    relevance = float(argv[i+1])
+                except ValueError:
+                    print(f"Please provide a number between 0 and 1 for {arg}!")
+                    exit(1)
+                if find_spec("numpy") is None:
+                    print("The relevance scoring needs numpy: pip install numpy")
+                    exit(1)
+                i += 1
+            elif arg in ["-run", "-r"]:
+                if len(argv) > 1:
+                    print("Cannot use -r option in combination with other options!")
+                    exit(1)
+                i += 1
+            else:
+                print(f"Unknown option: {arg}!"); exit(1)
+            i += 1
+    except IndexError:
+        print(f"Please provide a value for {argv[i]}!"); exit(1)
+    # check for valid inputs
+    try:
+        listings = resolve_listings(archives, categories)
+    except ValueError as error:
+        print(error); exit(1)
+    if batchfile:
+        try:
+            profiles = load_profiles(batchfile)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as error:
+            print(f"Could not read batch file '{batchfile}': {error!r}"); exit(1)
+    else:
+        profiles = [{"name": None, "keywords": keywords.split(","), "outfile": outfile}]
+    if statefile:
+        try:
+            state = CrawlState(statefile)
+        except (OSError, ValueError) as error:
+            print(f"Could not read state file '{statefile}': {error!r}"); exit(1)
+    else:
+        state = None
+    date = start_day(listings, date, state)
+
+    # print search parameters
+    archive_names = "; ".join(dict.fromkeys(archive for archive, _, _ in listings))
+    category_names = "; ".join(category for _, category, _ in listings if category)
+    print(f"Running search with:\n\t"
+          f"{format_text('archive', underline=True)}: {archive_names}\n\t" +
+          (f"{format_text('category', underline=True)}: {category_names}\n\t" if category_names else "") +
+          f"{format_text('date', underline=True)}: {date.strftime("%d.%m.%Y")} - {min(until, today).strftime("%d.%m.%Y")}\n\t" +
+          (f"{format_text('batch', underline=True)}: '{batchfile}' ({len(profiles)} profiles)\n\t" if batchfile else
+           f"{format_text('keywords', underline=True)}: {profiles[0]['keywords']}\n\t"
+           f"{format_text('outfile', underline=True)}: '{outfile}'\n\t") +
+          f"{format_text('output', underline=True)}: {formats}\n\t"
+          f"{format_text('save', underline=True)}: {save}\n\t"
+          f"{format_text('workers', underline=True)}: {workers}\n\t" +
+          (f"{format_text('processes', underline=True)}: {processes}\n\t" if processes > 1 else "") +
+          f"{format_text('cache', underline=True)}: {cachefile!r}\n\t"
+          f"{format_text('index', underline=True)}: {indexfile!r}" +
+          (f"\n\t{format_text('update', underline=True)}: '{statefile}'" if statefile else "") +
+          (f"\n\t{format_text('metadata', underline=True)}: '{metadata}'" if metadata else "") +
+          (f"\n\t{format_text('relevance', underline=True)}: {relevance}" if relevance is not None else ""))
+
+    # save old search outputs and create the outputs of every profile (the state remembers the reported papers per output file)
+    for profile in profiles:
+        if save and "txt" in formats:
+            save_old_results(profile["outfile"])
+        profile["key"] = profile["outfile"]
+        profile["sinks"] = open_sinks(formats, profile["outfile"].removesuffix(".txt"), profile["keywords"])
+
+    try:
+        search(archives, categories, date, until=until, profiles=profiles, workers=workers, pause=pause, cache=cachefile,
+               index=indexfile, state=state, metadata=metadata, relevance=relevance, processes=processes, verbose=True)
+    except FetchError as error:
+        print(f"{error}. The search was aborted, the output files are incomplete."); exit(1)
+
+    for profile in profiles:
+        files = ", ".join(f"'{sink.path}'" for sink in profile["sinks"])
+        print((f"Saved search results of '{profile['name']}'" if profile["name"] else "Saved search results") + f" to {files}.")
+    if state is not None:
+        print(f"Saved search state to '{statefile}'.")
 
-print(f"Saved search results to '{outfile}'.")
+if __name__ == "__main__":
+    main(sys.argv[1:])
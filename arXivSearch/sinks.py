@@ -0,0 +1,154 @@
+import csv
+import json
+from datetime import datetime
+from typing import Iterator, NamedTuple
+
+class Result(NamedTuple):
+    link: str
+    title: str
+    abstract: str
+    keywords: list[str]
+    categories: list[str]
+    score: float | None = None
+
+# names of the sections of a listing
+sub_mapping = {"New": "New submissions", "Cross": "Cross submissions", "Replace": "Replacement submissions"}
+
+class TextSink:
+    """Human readable output file. Starts with a header line containing the searched listings, the dates and the keywords
+    and lists the results day by day and section by section.
+    """
+    extension = ".txt"
+
+    def __init__(self, path: str, keywords: list[str]) -> None:
+        self.path = path
+        self.keywords = keywords
+
+    def begin(self, listings: list[tuple[str, str, str]], first: datetime, last: datetime) -> None:
+        """Opens the file and writes the header once the searched listings and dates are known.
+        """
+        self.categories = len(listings) > 1
+        self.file = open(self.path, "w", encoding="utf-8")
+        insert = ", ".join(f"'{archive}' - '{category or archive}'" for archive, category, _ in listings)
+        self.file.write(f"ArXiv search for {insert} from {first.strftime("%A")}, {first.strftime("%d.%m.%Y")} - {last.strftime("%A")}, {last.strftime("%d.%m.%Y")} "
+                        f"with keywords: {self.keywords}\n\n")
+
+    def write_day(self, day: datetime, results: dict[str, list[Result]]) -> None:
+        if any([results[k] for k in sub_mapping]):
+            self.file.write(f"{day.strftime("%A")}, {day.strftime("%d.%m.%Y")}:\n\n")
+            for sub, items in results.items():
+                if items:
+                    self.file.write(f"\t{sub_mapping[sub]}:\n\n")
+                    for item in items:
+                        categories = f", categories: {item.categories}" if self.categories else ""
+                        score = f", relevance: {item.score:.2f}" if item.score is not None else ""
+                        self.file.write(f"\t\t{item.link}, keywords: {item.keywords}{categories}{score}\n\t\t{item.title}\n\t\t\tAbstract: {item.abstract}\n\n")
+        else:
+            self.file.write(f"{day.strftime("%A")}, {day.strftime("%d.%m.%Y")}: No submissions found.\n\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+class RecordSink:
+    """Base class for the machine readable outputs with one flat record per result.
+    """
+    extension = ""
+    fields = ["date", "section", "id", "link", "title", "abstract", "keywords", "categories", "score"]
+
+    def __init__(self, path: str | None, keywords: list[str] | None = None) -> None:
+        self.path = path
+
+    def begin(self, listings: list[tuple[str, str, str]], first: datetime, last: datetime) -> None:
+        pass
+
+    @staticmethod
+    def records(day: datetime, results: dict[str, list[Result]]) -> Iterator[dict]:
+        for section, items in results.items():
+            for item in items:
+                yield {"date": day.strftime("%Y-%m-%d"), "section": section, "id": item.link.rstrip("/").rsplit("/", 1)[-1],
+                       "link": item.link, "title": item.title, "abstract": item.abstract, "keywords": item.keywords, "categories": item.categories, "score": item.score}
+
+class JSONLSink(RecordSink):
+    """One json object per line.
+    """
+    extension = ".jsonl"
+
+    def begin(self, listings: list[tuple[str, str, str]], first: datetime, last: datetime) -> None:
+        self.file = open(self.path, "w", encoding="utf-8")
+
+    def write_day(self, day: datetime, results: dict[str, list[Result]]) -> None:
+        for record in self.records(day, results):
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+class CSVSink(RecordSink):
+    """Comma seperated values with a header row. Keywords and categories are joined by ';'.
+    """
+    extension = ".csv"
+
+    def begin(self, listings: list[tuple[str, str, str]], first: datetime, last: datetime) -> None:
+        self.file = open(self.path, "w", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fields)
+        self.writer.writeheader()
+
+    def write_day(self, day: datetime, results: dict[str, list[Result]]) -> None:
+        for record in self.records(day, results):
+            record["keywords"] = ";".join(record["keywords"])
+            record["categories"] = ";".join(record["categories"])
+            self.writer.writerow(record)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+class ParquetSink(RecordSink):
+    """Parquet file with one row group per day (needs pyarrow).
+    """
+    extension = ".parquet"
+
+    def __init__(self, path: str, keywords: list[str] | None = None) -> None:
+        super().__init__(path, keywords)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("The parquet output needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.pq = pq
+        types = {"keywords": pa.list_(pa.string()), "categories": pa.list_(pa.string()), "score": pa.float64()}
+        self.schema = pa.schema([(field, types.get(field, pa.string())) for field in self.fields])
+
+    def begin(self, listings: list[tuple[str, str, str]], first: datetime, last: datetime) -> None:
+        self.writer = self.pq.ParquetWriter(self.path, self.schema)
+
+    def write_day(self, day: datetime, results: dict[str, list[Result]]) -> None:
+        records = list(self.records(day, results))
+        if records:
+            self.writer.write_table(self.pa.Table.from_pylist(records, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+class MemorySink(RecordSink):
+    """Collects the records in memory (used by `search` when no sink is given).
+    """
+    def __init__(self, path: str | None = None, keywords: list[str] | None = None) -> None:
+        super().__init__(path, keywords)
+        self.results = list()
+
+    def write_day(self, day: datetime, results: dict[str, list[Result]]) -> None:
+        self.results.extend(self.records(day, results))
+
+    def close(self) -> None:
+        pass
+
+sinks = {"txt": TextSink, "jsonl": JSONLSink, "csv": CSVSink, "parquet": ParquetSink}
+
+def open_sinks(formats: list[str], stem: str, keywords: list[str]) -> list:
+    """Creates one output '<stem>.<format>' per format. The files are written once the search begins.
+    """
+    return [sinks[output](f"{stem}{sinks[output].extension}", keywords) for output in formats]
@@ -0,0 +1,45 @@
+import json
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+class CrawlState:
+    """Persisted state of incremental searches: the last fully processed (i.e. finished) day of every listing and the arXiv
+    IDs that were already reported to every profile with the day they were reported on (forgotten again `keep` days after
+    that run, no matter how old the searched days were).
+    """
+    def __init__(self, path: str, keep: int = 90) -> None:
+        self.path = path
+        self.keep = keep
+        self.done = dict()
+        self.reported = dict()
+        if Path(path).exists():
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            self.done = data.get("done", dict())
+            self.reported = data.get("reported", dict())
+
+    def last_day(self, listing: str) -> date | None:
+        if listing in self.done:
+            return datetime.strptime(self.done[listing], "%Y-%m-%d").date()
+
+    def mark_done(self, listing: str, day: date) -> None:
+        last = self.last_day(listing)
+        if last is None or day > last:
+            self.done[listing] = day.strftime("%Y-%m-%d")
+
+    def is_reported(self, profile: str, arxiv_id: str) -> bool:
+        return arxiv_id in self.reported.get(profile, dict())
+
+    def mark_reported(self, profile: str, arxiv_id: str) -> None:
+        self.reported.setdefault(profile, dict())[arxiv_id] = date.today().strftime("%Y-%m-%d")
+
+    def save(self) -> None:
+        """Writes the state (without IDs older than `keep` days) to a temporary file first so that a crash never leaves a broken state file.
+        """
+        limit = (date.today() - timedelta(days=self.keep)).strftime("%Y-%m-%d")
+        self.reported = {profile: {key: day for key, day in ids.items() if day >= limit} for profile, ids in self.reported.items()}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump({"done": self.done, "reported": self.reported}, file, indent=1)
+        os.replace(tmp, self.path)